@@ -0,0 +1,286 @@
+"""
+Bandwidth Metering for Transcript Fetching
+Counts upstream bytes per proxy route and per job, and keeps a daily ledger
+
+Premium rotating proxies bill per GB, so every HTTP exchange made by
+youtube_transcript_api (through requests) inside a MeterScope is sized and
+charged to the route the attempt went through. BandwidthMeter aggregates the
+scopes of one job; DailyUsageLedger keeps per-tier totals per day on disk, so
+the premium byte budget holds across jobs and processes. Scopes are settled
+on the request thread when the attempt finishes, including attempts the
+caller stopped waiting for.
+
+Sizes are estimates of wire bytes: request line, headers and body each way,
+using Content-Length for response bodies when the server sends it.
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from fetch_cache import get_cache_dir
+
+GB = 1024 ** 3
+
+_local = threading.local()
+_install_lock = threading.Lock()
+_installed = False
+
+
+def _headers_size(headers):
+    return sum(len(key) + len(value) + 4 for key, value in headers.items())
+
+
+def _request_size(request):
+    size = len(request.method or '') + len(request.url or '') + 12
+    size += _headers_size(request.headers)
+    if isinstance(request.body, (bytes, str)):
+        size += len(request.body)
+    return size
+
+
+def _response_size(response, streamed):
+    size = 15 + len(response.reason or '') + _headers_size(response.headers)
+    length = response.headers.get('Content-Length', '')
+    if length.isdigit():
+        size += int(length)
+    elif not streamed:
+        # Body already read by Session.send; decoded size is close enough
+        size += len(response.content)
+    return size
+
+
+def install_requests_meter():
+    """
+    Wrap requests.Session.send so exchanges are charged to the active scope
+
+    Safe to call repeatedly; does nothing if requests isn't installed. Redirects
+    go back through Session.send, so each hop is counted once.
+    """
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        try:
+            import requests
+        except ImportError:
+            return
+
+        original_send = requests.Session.send
+
+        def send(self, request, **kwargs):
+            response = original_send(self, request, **kwargs)
+            scope = getattr(_local, 'scope', None)
+            if scope is not None:
+                scope.add(_request_size(request), _response_size(response, kwargs.get('stream', False)))
+            return response
+
+        requests.Session.send = send
+        _installed = True
+
+
+class MeterScope:
+    """Bytes used by one fetch attempt through one route"""
+
+    def __init__(self, route):
+        self.route = route
+        self.requests = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self._settled_requests = 0
+        self._settled_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total_bytes(self):
+        return self.request_bytes + self.response_bytes
+
+    def add(self, request_bytes, response_bytes):
+        with self._lock:
+            self.requests += 1
+            self.request_bytes += request_bytes
+            self.response_bytes += response_bytes
+
+    def unsettled(self):
+        """Take the requests and bytes not yet charged to the ledger"""
+        with self._lock:
+            requests = self.requests - self._settled_requests
+            nbytes = self.request_bytes + self.response_bytes - self._settled_bytes
+            self._settled_requests = self.requests
+            self._settled_bytes += nbytes
+        return requests, nbytes
+
+    def __enter__(self):
+        # Entered on the thread that makes the requests (see call_with_timeout)
+        install_requests_meter()
+        self._previous = getattr(_local, 'scope', None)
+        _local.scope = self
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.scope = self._previous
+        return False
+
+
+class BandwidthMeter:
+    """Per-job bandwidth totals, broken down by route"""
+
+    def __init__(self, ledger=None):
+        """
+        Args:
+            ledger: DailyUsageLedger to charge settled scopes to (None = job totals only)
+        """
+        self.ledger = ledger
+        self._scopes = []
+        self._lock = threading.Lock()
+
+    def open(self, route):
+        """Start metering one attempt through route"""
+        scope = MeterScope(route)
+        with self._lock:
+            self._scopes.append(scope)
+        return scope
+
+    def settle(self, scope):
+        """Charge an attempt's uncharged usage to the daily ledger (safe to repeat)"""
+        if self.ledger is None:
+            return
+        requests, nbytes = scope.unsettled()
+        if requests:
+            self.ledger.add(scope.route.tier, nbytes, requests)
+
+    def settle_all(self):
+        """Charge whatever attempts still running have used so far, e.g. before exit"""
+        with self._lock:
+            scopes = list(self._scopes)
+        for scope in scopes:
+            self.settle(scope)
+
+    def request_count(self):
+        """Upstream requests counted so far across all attempts"""
+        with self._lock:
+            scopes = list(self._scopes)
+        return sum(scope.requests for scope in scopes)
+
+    def to_dict(self):
+        routes = {}
+        with self._lock:
+            scopes = list(self._scopes)
+        for scope in scopes:
+            route = scope.route
+            entry = routes.setdefault(route.name, {
+                'tier': route.tier,
+                'attempts': 0,
+                'requests': 0,
+                'request_bytes': 0,
+                'response_bytes': 0,
+                'cost_per_gb': route.cost_per_gb
+            })
+            entry['attempts'] += 1
+            entry['requests'] += scope.requests
+            entry['request_bytes'] += scope.request_bytes
+            entry['response_bytes'] += scope.response_bytes
+
+        total_bytes = 0
+        total_cost = 0.0
+        for entry in routes.values():
+            entry['total_bytes'] = entry['request_bytes'] + entry['response_bytes']
+            entry['estimated_cost'] = round(entry['total_bytes'] / GB * entry['cost_per_gb'], 6)
+            total_bytes += entry['total_bytes']
+            total_cost += entry['estimated_cost']
+
+        return {
+            'total_bytes': total_bytes,
+            'estimated_cost': round(total_cost, 6),
+            'routes': routes
+        }
+
+
+def get_default_ledger_path():
+    return os.path.join(get_cache_dir(), 'bandwidth.sqlite3')
+
+
+class DailyUsageLedger:
+    """
+    Bytes and requests per tier per local day, shared by all processes
+
+    If the ledger file can't be opened, usage is kept in memory for this
+    process instead (persistent is False), so metering never fails a fetch.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or get_default_ledger_path()
+        self.persistent = True
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._open(self.path)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        except (sqlite3.Error, OSError) as e:
+            print(f"Bandwidth ledger unavailable ({e}); keeping usage in memory",
+                  file=sys.stderr, flush=True)
+            self.persistent = False
+            self._open(':memory:')
+
+    def _open(self, path):
+        # Attempts settle on their own request threads; _lock serializes them
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS usage (
+                day TEXT NOT NULL,
+                tier TEXT NOT NULL,
+                bytes INTEGER NOT NULL DEFAULT 0,
+                requests INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (day, tier)
+            )
+        ''')
+
+    @staticmethod
+    def today():
+        return time.strftime('%Y-%m-%d')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def add(self, tier, nbytes, requests=1, day=None):
+        """Add usage for a tier; errors are reported but never fail a fetch"""
+        try:
+            with self._lock:
+                self._conn.execute('''
+                    INSERT INTO usage (day, tier, bytes, requests) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (day, tier) DO UPDATE SET
+                        bytes = bytes + excluded.bytes,
+                        requests = requests + excluded.requests
+                ''', (day or self.today(), tier, nbytes, requests))
+        except sqlite3.Error as e:
+            print(f"Could not record bandwidth usage: {e}", file=sys.stderr, flush=True)
+
+    def used(self, tier, day=None):
+        """Bytes used by a tier on a day (default today), or None if unreadable"""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    'SELECT bytes FROM usage WHERE day = ? AND tier = ?', (day or self.today(), tier)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Could not read bandwidth usage: {e}", file=sys.stderr, flush=True)
+            return None
+        return row['bytes'] if row else 0
+
+    def usage(self, days=7):
+        """Usage rows for the most recent days, newest first"""
+        try:
+            with self._lock:
+                rows = self._conn.execute('''
+                    SELECT day, tier, bytes, requests FROM usage
+                    WHERE day IN (SELECT DISTINCT day FROM usage ORDER BY day DESC LIMIT ?)
+                    ORDER BY day DESC, tier
+                ''', (days,)).fetchall()
+        except sqlite3.Error as e:
+            print(f"Could not read bandwidth usage: {e}", file=sys.stderr, flush=True)
+            return []
+        return [dict(row) for row in rows]
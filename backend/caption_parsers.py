@@ -0,0 +1,278 @@
+"""
+Local Caption File Parsers
+Streams segments out of caption files without loading the whole file
+
+Supported formats:
+- WebVTT (.vtt)
+- SubRip (.srt)
+- YouTube json3 (.json, .json3)
+- YouTube timedtext XML, srv1/srv3 (.xml, .srv1, .srv3)
+- TTML (.ttml), with begin/end or begin/dur in clock or offset time
+
+Every parser yields segments shaped like the transcript API's dictionaries:
+{'text': str, 'start': seconds, 'duration': seconds}
+"""
+
+import html
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+
+VTT_EXTENSIONS = ('.vtt',)
+SRT_EXTENSIONS = ('.srt',)
+JSON3_EXTENSIONS = ('.json', '.json3')
+XML_EXTENSIONS = ('.xml', '.srv1', '.srv2', '.srv3', '.ttml')
+CAPTION_EXTENSIONS = VTT_EXTENSIONS + SRT_EXTENSIONS + JSON3_EXTENSIONS + XML_EXTENSIONS
+
+# Bytes read per chunk by the json3 parser
+READ_CHUNK_SIZE = 64 * 1024
+# Largest single json3 event; a real one is well under a kilobyte
+MAX_JSON_ITEM_SIZE = 1024 * 1024
+
+TIMESTAMP_PATTERN = re.compile(r'(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{1,3})')
+CUE_TIMING_PATTERN = re.compile(r'^\s*(\S+)\s+-->\s+(\S+)')
+TAG_PATTERN = re.compile(r'<[^>]*>')
+TTML_CLOCK_PATTERN = re.compile(r'^(\d+):(\d{2}):(\d{2}(?:\.\d+)?)$')
+TTML_OFFSET_PATTERN = re.compile(r'^(\d+(?:\.\d+)?)(h|m|s|ms)$')
+TTML_UNIT_SECONDS = {'h': 3600, 'm': 60, 's': 1, 'ms': 0.001}
+
+
+class CaptionParseError(Exception):
+    """Raised when a caption file can't be parsed"""
+
+
+def is_caption_file(path):
+    """Check whether path is an existing file with a supported caption extension"""
+    return os.path.isfile(path) and path.lower().endswith(CAPTION_EXTENSIONS)
+
+
+def find_caption_file(path):
+    """
+    Find a caption file for a local path
+
+    Returns path itself if it is a caption file, otherwise a sidecar caption
+    file with the same base name (e.g. lecture.mp4 -> lecture.vtt), or None.
+    """
+    if is_caption_file(path):
+        return path
+    if not os.path.isfile(path):
+        return None
+    base, _ = os.path.splitext(path)
+    for extension in CAPTION_EXTENSIONS:
+        candidate = base + extension
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def _parse_timestamp(value):
+    match = TIMESTAMP_PATTERN.match(value)
+    if not match:
+        raise CaptionParseError(f"Invalid timestamp: {value}")
+    hours, minutes, seconds, fraction = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(fraction.ljust(3, '0')) / 1000
+
+
+def _parse_ttml_time(value):
+    """Parse a TTML clock time (hh:mm:ss.fff) or offset time (1.5s, 1500ms, ...)"""
+    value = value.strip()
+    match = TTML_CLOCK_PATTERN.match(value)
+    if match:
+        hours, minutes, seconds = match.groups()
+        return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    match = TTML_OFFSET_PATTERN.match(value)
+    if match:
+        return float(match.group(1)) * TTML_UNIT_SECONDS[match.group(2)]
+    # Frame and tick times need the document's frame/tick rate
+    raise CaptionParseError(f"Unsupported TTML time expression: {value}")
+
+
+def _clean_cue_text(lines):
+    text = ' '.join(TAG_PATTERN.sub('', line).strip() for line in lines)
+    return html.unescape(' '.join(text.split()))
+
+
+def _iter_cues(lines):
+    """Shared VTT/SRT cue reader: yields (start, end, text lines) per cue"""
+    timing = None
+    text_lines = []
+    for raw_line in lines:
+        line = raw_line.rstrip('\r\n')
+        if not line.strip():
+            if timing and text_lines:
+                yield timing[0], timing[1], text_lines
+            timing = None
+            text_lines = []
+            continue
+        match = CUE_TIMING_PATTERN.match(line)
+        if match:
+            timing = (_parse_timestamp(match.group(1)), _parse_timestamp(match.group(2)))
+            text_lines = []
+        elif timing:
+            text_lines.append(line)
+    if timing and text_lines:
+        yield timing[0], timing[1], text_lines
+
+
+def iter_cue_segments(lines):
+    """
+    Yield segments from WebVTT or SubRip lines
+
+    YouTube's auto-generated VTT repeats the previous cue's line at the top of
+    each rolling cue; lines identical to the previous cue's last line are dropped.
+    """
+    previous_last_line = None
+    for start, end, text_lines in _iter_cues(lines):
+        cleaned = [_clean_cue_text([line]) for line in text_lines]
+        cleaned = [line for line in cleaned if line]
+        if cleaned and cleaned[0] == previous_last_line:
+            cleaned = cleaned[1:]
+        if cleaned:
+            previous_last_line = cleaned[-1]
+            yield {'text': ' '.join(cleaned), 'start': start, 'duration': max(0.0, end - start)}
+
+
+def _iter_json_array_items(f, key):
+    """
+    Incrementally decode the items of the top-level array stored under key
+
+    Reads the file in chunks and decodes one array element at a time, so
+    memory is bounded by the largest single element rather than the file.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    eof = False
+
+    def fill():
+        nonlocal buffer, eof
+        chunk = f.read(READ_CHUNK_SIZE)
+        if chunk:
+            buffer += chunk
+        else:
+            eof = True
+
+    # Find the start of the array
+    marker = f'"{key}"'
+    while True:
+        index = buffer.find(marker)
+        if index != -1:
+            bracket = buffer.find('[', index + len(marker))
+            if bracket != -1:
+                buffer = buffer[bracket + 1:]
+                break
+        if eof:
+            raise CaptionParseError(f'No "{key}" array found')
+        # Keep a tail in case the marker straddles two chunks
+        buffer = buffer[-len(marker):] if index == -1 else buffer[index:]
+        fill()
+
+    while True:
+        stripped = buffer.lstrip(' \t\r\n,')
+        if not stripped:
+            if eof:
+                raise CaptionParseError(f'Unterminated "{key}" array')
+            buffer = ''
+            fill()
+            continue
+        if stripped[0] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(stripped)
+        except ValueError:
+            if eof:
+                raise CaptionParseError(f'Invalid item in "{key}" array')
+            if len(stripped) > MAX_JSON_ITEM_SIZE:
+                # A malformed item would otherwise pull in the rest of the file
+                raise CaptionParseError(f'Item in "{key}" array exceeds {MAX_JSON_ITEM_SIZE} characters')
+            buffer = stripped
+            fill()
+            continue
+        buffer = stripped[end:]
+        yield item
+
+
+def iter_json3_segments(f):
+    """Yield segments from a YouTube json3 caption file object"""
+    for event in _iter_json_array_items(f, 'events'):
+        segs = event.get('segs')
+        if not segs:
+            continue
+        text = ' '.join(''.join(seg.get('utf8', '') for seg in segs).split())
+        if not text:
+            continue
+        yield {
+            'text': text,
+            'start': event.get('tStartMs', 0) / 1000,
+            'duration': event.get('dDurationMs', 0) / 1000,
+        }
+
+
+def _element_text(element):
+    """Text of an element, with <br/> (TTML line breaks) read as a space"""
+    parts = [element.text or '']
+    for child in element:
+        if child.tag.rsplit('}', 1)[-1] == 'br':
+            parts.append(' ')
+        else:
+            parts.append(_element_text(child))
+        parts.append(child.tail or '')
+    return ''.join(parts)
+
+
+def iter_timedtext_segments(f):
+    """
+    Yield segments from YouTube timedtext XML
+
+    Handles srv1 (<text start="s" dur="s">), srv3 (<p t="ms" d="ms">) and
+    TTML (<p begin="..." end="..."> or begin/dur), clearing each element once
+    read so memory stays flat.
+    """
+    for _, element in ET.iterparse(f, events=('end',)):
+        tag = element.tag.rsplit('}', 1)[-1]
+        if tag == 'text':
+            start = float(element.get('start', 0))
+            duration = float(element.get('dur', 0))
+        elif tag == 'p' and element.get('begin') is not None:
+            start = _parse_ttml_time(element.get('begin'))
+            if element.get('end') is not None:
+                duration = max(0.0, _parse_ttml_time(element.get('end')) - start)
+            elif element.get('dur') is not None:
+                duration = _parse_ttml_time(element.get('dur'))
+            else:
+                raise CaptionParseError('TTML cue has begin but no end or dur')
+        elif tag == 'p':
+            start = int(element.get('t', 0)) / 1000
+            duration = int(element.get('d', 0)) / 1000
+        else:
+            continue
+        # Auto captions are sometimes double-escaped (&amp;#39;)
+        text = html.unescape(html.unescape(_element_text(element)))
+        text = ' '.join(text.split())
+        element.clear()
+        if text:
+            yield {'text': text, 'start': start, 'duration': duration}
+
+
+def iter_caption_segments(path):
+    """
+    Stream segments from a local caption file, choosing the parser by extension
+
+    Args:
+        path: Path to a supported caption file
+
+    Yields:
+        dict: {'text', 'start', 'duration'} per caption segment
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in VTT_EXTENSIONS + SRT_EXTENSIONS:
+        with open(path, 'r', encoding='utf-8-sig', errors='replace') as f:
+            yield from iter_cue_segments(f)
+    elif extension in JSON3_EXTENSIONS:
+        with open(path, 'r', encoding='utf-8-sig') as f:
+            yield from iter_json3_segments(f)
+    elif extension in XML_EXTENSIONS:
+        with open(path, 'rb') as f:
+            yield from iter_timedtext_segments(f)
+    else:
+        raise CaptionParseError(f"Unsupported caption format: {extension or path}")
@@ -0,0 +1,243 @@
+"""
+Content-Addressed Chunk Manifests
+Stable per-chunk hashes so refetched text is only re-embedded where it changed
+
+The text is normalized (normalize_text) before it is chunked, and chunk
+boundaries are anchored on content rather than on fixed offsets: a chunk ends
+at a sentence end near the target size or, in unpunctuated text such as auto
+captions, before the nearby word with the lowest hash. An edit therefore only
+moves the boundaries around it, later chunks resynchronize, and re-spacing or
+re-encoding the text moves nothing.
+
+utils/textChunker.js implements the same normalization and boundary rule,
+and its chunks carry the same contentHash, so a manifest's hashes name the
+chunks the RAG pipeline embeds. Change both files together. start_index and
+end_index are code point offsets into the normalized text. NFKC follows each
+runtime's Unicode tables, so characters newer than the older runtime knows
+can normalize differently; such chunks are simply embedded again.
+"""
+
+import hashlib
+import re
+import unicodedata
+
+from fetch_cache import JsonFileCache
+
+# Defaults match TextChunker in utils/textChunker.js (see RAGService)
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 150
+MIN_CHUNK_SIZE = 100
+MAX_CHUNKS = 50
+
+SENTENCE_END_PATTERN = re.compile(r'[.!?]\s+')
+WORD_PATTERN = re.compile(r'\S+')
+ZERO_WIDTH_PATTERN = re.compile('[\u200b\u200c\u200d\u2060\ufeff]')
+
+HASH_ALGORITHM = 'sha256'
+
+
+def normalize_text(text):
+    """
+    Normalize text before hashing
+
+    NFKC-normalizes, drops zero-width characters and collapses whitespace, so
+    re-encoding or re-spacing a transcript doesn't change its chunk hashes.
+    """
+    text = unicodedata.normalize('NFKC', text)
+    text = ZERO_WIDTH_PATTERN.sub('', text)
+    return ' '.join(text.split())
+
+
+def content_hash(text):
+    """Hash the normalized form of text"""
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def _find_sentence_boundary(text, index, search_range=100):
+    start = max(0, index - search_range)
+    end = min(len(text), index + search_range)
+    last_match = index
+    for match in SENTENCE_END_PATTERN.finditer(text, start, end):
+        if match.end() <= index:
+            last_match = match.end()
+        else:
+            break
+    return last_match
+
+
+def _word_hash(word):
+    # 32-bit FNV-1a: stable across runs and simple to reproduce in JavaScript
+    value = 0x811c9dc5
+    for byte in word.encode('utf-8'):
+        value = ((value ^ byte) * 0x01000193) & 0xffffffff
+    return value
+
+
+def _find_content_boundary(text, index, search_range=100):
+    """
+    Pick a boundary before index from the words themselves
+
+    Ends the chunk before the word with the lowest hash among the words that
+    start within search_range characters before index. Shifting the text by
+    a few characters usually leaves that word in range, so the same cut is
+    found again.
+    """
+    start = max(0, index - search_range)
+    best_position = index
+    best_hash = None
+    for match in WORD_PATTERN.finditer(text, start):
+        if match.start() > index:
+            break
+        if match.start() == start and start > 0 and not text[start - 1].isspace():
+            continue  # Word began before the window
+        word_hash = _word_hash(match.group())
+        if best_hash is None or word_hash < best_hash:
+            best_position, best_hash = match.start(), word_hash
+    return best_position
+
+
+def chunk_text(text, chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP,
+               min_chunk_size=MIN_CHUNK_SIZE, max_chunks=MAX_CHUNKS):
+    """
+    Split text into overlapping chunks with content-anchored boundaries
+
+    Callers hashing chunks should pass normalized text (build_manifest does).
+
+    Returns:
+        list: Dicts with text, chunk_index, start_index and end_index
+    """
+    if not text or not isinstance(text, str):
+        return []
+
+    if len(text) <= chunk_size:
+        return [{'text': text.strip(), 'chunk_index': 0, 'start_index': 0, 'end_index': len(text)}]
+
+    chunks = []
+    start_index = 0
+    while start_index < len(text) and len(chunks) < max_chunks:
+        end_index = min(start_index + chunk_size, len(text))
+
+        # Try to break at sentence boundary, else at a content-chosen word
+        if end_index < len(text):
+            boundary = _find_sentence_boundary(text, end_index)
+            if boundary == end_index:
+                boundary = _find_content_boundary(text, end_index)
+            if boundary > start_index + min_chunk_size:
+                end_index = boundary
+
+        piece = text[start_index:end_index].strip()
+        if len(piece) >= min_chunk_size:
+            chunks.append({
+                'text': piece,
+                'chunk_index': len(chunks),
+                'start_index': start_index,
+                'end_index': end_index
+            })
+
+        # Stop at the end of the text; TextChunker keeps re-emitting the
+        # overlapping tail until maxChunks, which would only repeat a hash
+        if end_index >= len(text):
+            break
+        start_index = max(0, end_index - chunk_overlap)
+
+    return chunks
+
+
+def build_manifest(source_id, text, **chunk_options):
+    """
+    Normalize text, chunk it and hash every chunk
+
+    Args:
+        source_id: Stable identifier of the source (e.g. 'transcript:<video_id>')
+        text: Full source text
+        **chunk_options: Overrides for chunk_text()
+
+    Returns:
+        dict: Manifest with the source hash and one entry per chunk (including text)
+    """
+    chunks = chunk_text(normalize_text(text or ''), **chunk_options)
+    for chunk in chunks:
+        chunk['hash'] = content_hash(chunk['text'])
+    return {
+        'source_id': source_id,
+        'algorithm': HASH_ALGORITHM,
+        'source_hash': content_hash(text or ''),
+        'chunk_count': len(chunks),
+        'chunks': chunks
+    }
+
+
+def diff_manifests(previous, current):
+    """
+    Compare two manifests of the same source
+
+    Chunks are matched by hash, so a chunk that only moved keeps its embedding.
+
+    Args:
+        previous: Earlier manifest, or None for a new source
+        current: Manifest just built
+
+    Returns:
+        dict: added (chunks to embed), unchanged (hash -> previous and current
+            index) and removed (hashes whose vectors can be deleted)
+    """
+    previous_chunks = (previous or {}).get('chunks', [])
+    previous_index = {}
+    for chunk in previous_chunks:
+        previous_index.setdefault(chunk['hash'], chunk['chunk_index'])
+
+    added = []
+    unchanged = []
+    current_hashes = set()
+    for chunk in current['chunks']:
+        current_hashes.add(chunk['hash'])
+        if chunk['hash'] in previous_index:
+            unchanged.append({
+                'hash': chunk['hash'],
+                'previous_index': previous_index[chunk['hash']],
+                'chunk_index': chunk['chunk_index']
+            })
+        else:
+            added.append(chunk)
+
+    removed = sorted({chunk['hash'] for chunk in previous_chunks} - current_hashes)
+
+    return {
+        'source_id': current['source_id'],
+        'source_changed': (previous or {}).get('source_hash') != current['source_hash'],
+        'added': added,
+        'unchanged': unchanged,
+        'removed': removed
+    }
+
+
+class ManifestStore:
+    """Keeps the latest manifest per source in the local fetch cache"""
+
+    def __init__(self, cache=None):
+        self.cache = cache or JsonFileCache('chunk_manifests')
+
+    def get(self, source_id):
+        return self.cache.get(source_id)
+
+    def save(self, manifest):
+        # Chunk text is not needed to diff later versions, only hashes and positions
+        stored = dict(manifest)
+        stored['chunks'] = [
+            {key: value for key, value in chunk.items() if key != 'text'}
+            for chunk in manifest['chunks']
+        ]
+        self.cache.set(manifest['source_id'], stored)
+
+    def update(self, source_id, text, save=True, **chunk_options):
+        """
+        Build a manifest for text, diff it against the stored one and store it
+
+        Returns:
+            dict: The diff_manifests() result for this version
+        """
+        manifest = build_manifest(source_id, text, **chunk_options)
+        diff = diff_manifests(self.get(source_id), manifest)
+        if save:
+            self.save(manifest)
+        return diff
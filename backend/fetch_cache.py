@@ -0,0 +1,72 @@
+"""
+Local Fetch Cache
+Small file-backed JSON cache shared by the fetch scripts
+
+Each entry is stored as its own file under <cache dir>/<namespace>/<key>.json so
+concurrent worker threads and processes never rewrite each other's entries.
+Set EDUEXTRACT_CACHE_DIR to move the cache (default: backend/.cache).
+"""
+
+import json
+import os
+import re
+import tempfile
+import time
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+
+
+def get_cache_dir():
+    """Get the root directory of the local fetch cache"""
+    return os.environ.get('EDUEXTRACT_CACHE_DIR', DEFAULT_CACHE_DIR)
+
+
+class JsonFileCache:
+    """JSON cache with one file per key and optional expiry"""
+
+    def __init__(self, namespace, ttl_seconds=None, cache_dir=None):
+        """
+        Args:
+            namespace: Subdirectory for this kind of entry (e.g. 'video_metadata')
+            ttl_seconds: Entries older than this are treated as missing (None = never expire)
+            cache_dir: Root cache directory (default: get_cache_dir())
+        """
+        self.directory = os.path.join(cache_dir or get_cache_dir(), namespace)
+        self.ttl_seconds = ttl_seconds
+
+    def _path(self, key):
+        # Keys are video ids in practice; anything else is made filesystem-safe
+        safe_key = re.sub(r'[^A-Za-z0-9_.-]', '_', str(key))
+        return os.path.join(self.directory, f"{safe_key}.json")
+
+    def get(self, key):
+        """Return the cached value for key, or None if missing or expired"""
+        path = self._path(key)
+        try:
+            if self.ttl_seconds is not None and time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, key, value):
+        """Store value under key; write failures are ignored since the cache is best-effort"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write to a temp file and rename so readers never see a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            pass
+
+    def has(self, key):
+        """Check whether a non-expired entry exists for key"""
+        path = self._path(key)
+        try:
+            age = time.time() - os.path.getmtime(path)
+        except OSError:
+            return False
+        return self.ttl_seconds is None or age <= self.ttl_seconds
@@ -0,0 +1,600 @@
+#!/usr/bin/env python3
+"""
+Unified Fetch CLI
+Single entry point for transcript, batch and playlist fetching
+
+Heavy dependencies (yt_dlp, youtube_transcript_api) are only imported by the
+subcommand that needs them, so a single transcript fetch never pays for yt_dlp.
+
+Usage:
+    python fetch_cli.py transcript [--user-id=UID] [--json] <video_id>
+    python fetch_cli.py batch [--delay=N] [--chunk-size=N] [--advanced] [--use-proxy] [--interactive]
+                              [--order=given|shortest|longest] [--durations-file=PATH]
+                              [--deadline=SECONDS] [--request-timeout=SECONDS]
+                              [--trace=PATH] [--manifests] video_id1 ...
+    python fetch_cli.py playlist [--enrich] [--workers=N] [--trace=PATH] [--prefetch=N] <playlist_url>
+    python fetch_cli.py playlists [--file=PATH] [--workers=N] [--trace=PATH] [url ...]  (URLs on stdin by default)
+    python fetch_cli.py prefetch [--limit=N] [--rate=N] [--max-seconds=N] video_id1 ...
+    python fetch_cli.py enqueue [--queue=PATH] --job-id=ID video_id1 ...
+    python fetch_cli.py worker [--queue=PATH] [--worker-id=NAME] [--lease-seconds=N] [--forever]
+    python fetch_cli.py job [--queue=PATH] --job-id=ID
+    python fetch_cli.py chunks --source-id=ID [--file=PATH] [--dry-run]  (text on stdin by default)
+    python fetch_cli.py ingest --video-id=ID --user-id=UID [--format=json3|timedtext] [--file=PATH]  (payload on stdin by default)
+    python fetch_cli.py usage [--days=N]
+    python fetch_cli.py bench [--runs=N] [subcommand ...]
+"""
+
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Module implementing each subcommand, and the third-party imports that
+# running it pulls in. Used both for dispatch and for the startup benchmark.
+SUBCOMMANDS = {
+    'transcript': {
+        'module': 'get_transcript',
+        'dependencies': ['youtube_transcript_api'],
+    },
+    'batch': {
+        'module': 'get_batch_transcripts',
+        'dependencies': ['youtube_transcript_api'],
+    },
+    'batch-advanced': {
+        'module': 'get_batch_transcripts_advanced',
+        'dependencies': ['youtube_transcript_api'],
+    },
+    'playlist': {
+        'module': 'get_playlist',
+        'dependencies': ['yt_dlp'],
+    },
+}
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_subcommand(name, preload=False):
+    """
+    Import the module backing a subcommand
+
+    Args:
+        name: Key in SUBCOMMANDS
+        preload: Also import the subcommand's third-party dependencies
+
+    Returns:
+        module: The imported subcommand module
+    """
+    spec = SUBCOMMANDS[name]
+    module = importlib.import_module(spec['module'])
+    if preload:
+        for dependency in spec['dependencies']:
+            importlib.import_module(dependency)
+    return module
+
+
+def make_tracer(args):
+    """Create a Tracer when --trace was given, otherwise the no-op tracer"""
+    from fetch_tracing import NULL_TRACER, Tracer
+    if getattr(args, 'trace', None):
+        return Tracer(process_name=f"fetch_cli {args.command}")
+    return NULL_TRACER
+
+
+def emit_json(result, tracer, trace_path):
+    """Print a JSON result, then write the trace file if tracing is enabled"""
+    with tracer.span('serialize_json', category='output'):
+        output = json.dumps(result, ensure_ascii=False)
+    print(output)
+    if trace_path:
+        tracer.write(trace_path)
+        print(f"Trace written to {trace_path}", file=sys.stderr, flush=True)
+
+
+def run_transcript(args):
+    """Fetch a single transcript and print plain text"""
+    from prefetch import foreground_job
+    get_transcript = load_subcommand('transcript')
+    with foreground_job():
+        return get_transcript.run(args.video_id, user_id=args.user_id, as_json=args.json)
+
+
+def run_batch(args):
+    """Fetch transcripts for several videos and print the JSON results"""
+    from prefetch import foreground_job
+    with foreground_job():
+        return _run_batch(args)
+
+
+def _run_batch(args):
+    if not args.video_ids:
+        print(json.dumps({
+            'success': False,
+            'error': 'No video IDs provided'
+        }))
+        return 1
+
+    from job_control import Deadline, GracefulShutdown
+
+    # Start the clock and take over SIGTERM/SIGINT before any network work,
+    # so a cancelled job still prints what it fetched
+    deadline = Deadline(args.deadline)
+    shutdown = GracefulShutdown().install()
+    tracer = make_tracer(args)
+    video_ids = args.video_ids
+    if args.order != 'given':
+        import video_scheduler
+        with tracer.span('schedule', category='batch', order=args.order):
+            if args.durations_file:
+                durations = video_scheduler.load_durations(args.durations_file)
+            else:
+                durations = video_scheduler.lookup_durations(
+                    video_ids, enrich=True, max_workers=args.workers, tracer=tracer,
+                    shutdown=shutdown, deadline=deadline
+                )
+            video_ids = video_scheduler.order_video_ids(video_ids, args.order, durations)
+        print(f"Fetch order ({args.order}): {' '.join(video_ids)}", file=sys.stderr, flush=True)
+
+    if args.advanced:
+        module = load_subcommand('batch-advanced')
+        fetcher = module.TranscriptFetcher(
+            use_proxy=args.use_proxy,
+            chunk_size=args.chunk_size,
+            base_delay=args.delay if args.delay is not None else 8,
+            tracer=tracer,
+            max_extra_request_ratio=args.retry_budget_ratio,
+            max_backoff_seconds=args.retry_budget_seconds,
+            request_timeout=args.request_timeout,
+            deadline=deadline,
+            shutdown=shutdown,
+            interactive=args.interactive
+        )
+        results = fetcher.fetch_batch(video_ids)
+    else:
+        module = load_subcommand('batch')
+        results = module.fetch_batch_transcripts(
+            video_ids,
+            args.delay if args.delay is not None else 5,
+            tracer=tracer,
+            request_timeout=args.request_timeout,
+            deadline=deadline,
+            shutdown=shutdown
+        )
+
+    if args.manifests:
+        from chunk_manifest import ManifestStore
+        store = ManifestStore()
+        for video_id, result in results['transcripts'].items():
+            if result.get('success'):
+                # Added chunks keep their text: their offsets are into the
+                # normalized transcript, which isn't in the result
+                result['chunk_diff'] = store.update(f"transcript:{video_id}", result['text'])
+
+    emit_json(results, tracer, args.trace)
+    return 0
+
+
+def run_chunks(args):
+    """Chunk a source's text, hash each chunk and diff against the stored manifest"""
+    from chunk_manifest import ManifestStore
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            text = f.read()
+    else:
+        text = sys.stdin.read()
+
+    diff = ManifestStore().update(args.source_id, text, save=not args.dry_run)
+    print(json.dumps({'success': True, **diff}, ensure_ascii=False))
+    return 0
+
+
+def run_ingest(args):
+    """Store a browser-captured caption payload for the submitting user"""
+    from transcript_ingest import TranscriptIngestError, ingest_transcript
+    if args.file:
+        with open(args.file, 'rb') as f:
+            payload = f.read()
+    else:
+        payload = sys.stdin.buffer.read()
+
+    try:
+        result = ingest_transcript(args.video_id, payload, args.user_id, fmt=args.format)
+    except TranscriptIngestError as e:
+        print(json.dumps({
+            'success': False,
+            'video_id': args.video_id,
+            'error': str(e),
+            'error_type': type(e).__name__
+        }))
+        return 1
+
+    # The caller already has the payload; report what was stored
+    print(json.dumps({
+        'success': True,
+        'video_id': result['video_id'],
+        'segment_count': result['segment_count'],
+        'characters': len(result['text']),
+        'source': result['source']
+    }))
+    return 0
+
+
+def run_playlist(args):
+    """List the videos of a playlist or channel and print the JSON result"""
+    get_playlist = load_subcommand('playlist')
+    listing_url = get_playlist.normalize_listing_url(args.playlist_url)
+    if not listing_url:
+        print(json.dumps({
+            'success': False,
+            'error': 'Invalid playlist URL. Must contain "list=" parameter or be a channel URL.'
+        }))
+        return 1
+
+    tracer = make_tracer(args)
+    result = get_playlist.get_playlist_videos(listing_url, tracer=tracer)
+    if args.enrich and result.get('success'):
+        result['enrichment'] = get_playlist.enrich_playlist_videos(
+            result['videos'], max_workers=args.workers, tracer=tracer
+        )
+    emit_json(result, tracer, args.trace)
+
+    if args.prefetch and result.get('success'):
+        import prefetch
+        prefetch.spawn_prefetch([video['id'] for video in result['videos']], limit=args.prefetch)
+    return 0
+
+
+def read_url_list(lines):
+    """URLs from a file or stdin, one per line; blank lines and # comments are skipped"""
+    urls = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            urls.append(line)
+    return urls
+
+
+def run_playlists(args):
+    """List many playlists or channels, printing one JSON line per listing"""
+    urls = list(args.urls)
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            urls.extend(read_url_list(f))
+    elif not urls:
+        urls = read_url_list(sys.stdin)
+
+    if not urls:
+        print(json.dumps({
+            'success': False,
+            'error': 'No playlist or channel URLs provided'
+        }))
+        return 1
+
+    tracer = make_tracer(args)
+    get_playlist = load_subcommand('playlist')
+    # JSON Lines, flushed per listing so the caller can start importing early
+    for entry in get_playlist.list_playlists_bulk(urls, max_workers=args.workers, tracer=tracer):
+        print(json.dumps(entry, ensure_ascii=False), flush=True)
+    if args.trace:
+        tracer.write(args.trace)
+        print(f"Trace written to {args.trace}", file=sys.stderr, flush=True)
+    return 0
+
+
+def run_prefetch(args):
+    """Fetch the first uncached videos into the transcript cache at a low rate"""
+    import prefetch
+    from job_control import GracefulShutdown
+    stats = prefetch.run_prefetch(
+        args.video_ids,
+        limit=args.limit,
+        requests_per_minute=args.rate,
+        max_seconds=args.max_seconds,
+        shutdown=GracefulShutdown().install()
+    )
+    print(json.dumps({'success': True, **stats}))
+    return 0
+
+
+def run_enqueue(args):
+    """Add a job's videos to the durable work queue"""
+    from work_queue import SQLiteWorkQueue
+    if not args.video_ids:
+        print(json.dumps({
+            'success': False,
+            'error': 'No video IDs provided'
+        }))
+        return 1
+
+    queue = SQLiteWorkQueue(args.queue)
+    added = queue.enqueue(args.job_id, args.video_ids)
+    print(json.dumps({'success': True, 'job_id': args.job_id, 'added': added, 'queue': queue.path}))
+    return 0
+
+
+def run_worker(args):
+    """Drain the durable work queue with one worker process"""
+    from job_control import GracefulShutdown
+    from prefetch import foreground_job
+    from work_queue import SQLiteWorkQueue
+    import queue_worker
+    module = load_subcommand('batch-advanced')
+    fetcher = module.TranscriptFetcher(
+        use_proxy=args.use_proxy,
+        base_delay=args.delay if args.delay is not None else 8,
+        request_timeout=args.request_timeout,
+        shutdown=GracefulShutdown().install()
+    )
+    queue = SQLiteWorkQueue(args.queue, max_deliveries=args.max_deliveries)
+    with foreground_job():
+        stats = queue_worker.run_worker(
+            queue, fetcher,
+            worker_id=args.worker_id,
+            lease_seconds=args.lease_seconds,
+            exit_when_idle=not args.forever
+        )
+    stats['bandwidth'] = fetcher.bandwidth_report(stats['completed'])
+    print(json.dumps({'success': True, **stats}))
+    return 0
+
+
+def run_job(args):
+    """Print the collected results of a queued job in batch output format"""
+    from work_queue import SQLiteWorkQueue
+    import queue_worker
+    queue = SQLiteWorkQueue(args.queue)
+    print(json.dumps(queue_worker.build_job_results(queue, args.job_id), ensure_ascii=False))
+    return 0
+
+
+def measure_startup(name):
+    """
+    Measure the startup cost of one subcommand in a fresh interpreter
+
+    Args:
+        name: Key in SUBCOMMANDS, or None for a bare interpreter baseline
+
+    Returns:
+        dict: Wall-clock process time and in-process import time in milliseconds
+    """
+    if name is None:
+        code = "print('{\"import_ms\": 0.0}')"
+    else:
+        code = (
+            "import json, time\n"
+            "start = time.perf_counter()\n"
+            "import fetch_cli\n"
+            "error = None\n"
+            "try:\n"
+            f"    fetch_cli.load_subcommand({name!r}, preload=True)\n"
+            "except ImportError as e:\n"
+            "    error = str(e)\n"
+            "print(json.dumps({'import_ms': (time.perf_counter() - start) * 1000, 'error': error}))\n"
+        )
+
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    try:
+        measurement = json.loads(completed.stdout.strip().splitlines()[-1])
+    except (ValueError, IndexError):
+        measurement = {'import_ms': None, 'error': completed.stderr.strip() or 'No output'}
+
+    measurement['wall_ms'] = wall_ms
+    return measurement
+
+
+def run_usage(args):
+    """Print upstream bytes per tier per day, with today's premium budget"""
+    from bandwidth_meter import DailyUsageLedger
+    from proxy_router import PREMIUM, get_premium_daily_budget
+    ledger = DailyUsageLedger()
+    if not ledger.persistent:
+        print(json.dumps({
+            'success': False,
+            'error': f"Bandwidth ledger {ledger.path} could not be opened"
+        }))
+        return 1
+    print(json.dumps({
+        'success': True,
+        'premium_bytes_today': ledger.used(PREMIUM),
+        'premium_daily_budget': get_premium_daily_budget(),
+        'days': ledger.usage(args.days)
+    }))
+    return 0
+
+
+def run_bench(args):
+    """Report per-subcommand startup cost as JSON"""
+    names = args.subcommands or list(SUBCOMMANDS)
+    unknown = [name for name in names if name not in SUBCOMMANDS]
+    if unknown:
+        print(json.dumps({
+            'success': False,
+            'error': f"Unknown subcommand(s): {', '.join(unknown)}"
+        }))
+        return 1
+
+    def best_of(name):
+        runs = [measure_startup(name) for _ in range(args.runs)]
+        best = min(runs, key=lambda run: run['wall_ms'])
+        return {
+            'wall_ms': round(best['wall_ms'], 2),
+            'import_ms': round(best['import_ms'], 2) if best.get('import_ms') is not None else None,
+            'error': best.get('error'),
+        }
+
+    baseline = best_of(None)
+    results = {
+        'success': True,
+        'runs': args.runs,
+        'python': sys.version.split()[0],
+        'baseline_wall_ms': baseline['wall_ms'],
+        'subcommands': {}
+    }
+
+    for name in names:
+        measurement = best_of(name)
+        measurement['dependencies'] = SUBCOMMANDS[name]['dependencies']
+        measurement['overhead_ms'] = round(measurement['wall_ms'] - baseline['wall_ms'], 2)
+        results['subcommands'][name] = measurement
+        print(f"{name}: {measurement['wall_ms']:.1f}ms wall, "
+              f"{measurement['overhead_ms']:.1f}ms over baseline", file=sys.stderr, flush=True)
+
+    print(json.dumps(results, ensure_ascii=False))
+    return 0
+
+
+def build_parser():
+    """Build the argument parser with one subparser per subcommand"""
+    parser = argparse.ArgumentParser(
+        prog='fetch_cli.py',
+        description='Fetch YouTube transcripts and playlist listings'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    transcript = subparsers.add_parser('transcript', help='Fetch a single transcript as plain text')
+    transcript.add_argument('video_id')
+    transcript.add_argument('--user-id', default=None,
+                            help="Also accept this user's own ingested transcript")
+    transcript.add_argument('--json', action='store_true',
+                            help='Print the text and its source as JSON instead of plain text')
+    transcript.set_defaults(handler=run_transcript)
+
+    batch = subparsers.add_parser('batch', help='Fetch transcripts for several videos as JSON')
+    batch.add_argument('video_ids', nargs='*')
+    batch.add_argument('--delay', type=int, default=None,
+                       help='Delay in seconds between requests (default: 5, or 8 with --advanced)')
+    batch.add_argument('--chunk-size', type=int, default=5,
+                       help='Videos per chunk before an extended break (--advanced only)')
+    batch.add_argument('--advanced', action='store_true',
+                       help='Use the advanced fetcher with retries and chunked spacing')
+    batch.add_argument('--use-proxy', action='store_true',
+                       help='Rotate through configured proxies (--advanced only)')
+    batch.add_argument('--interactive', action='store_true',
+                       help='A user is waiting: allow premium proxies on first attempts (--advanced only)')
+    batch.add_argument('--retry-budget-ratio', type=float, default=0.25,
+                       help='Extra requests allowed for retries, as a fraction of the batch (--advanced only)')
+    batch.add_argument('--retry-budget-seconds', type=int, default=300,
+                       help='Total retry backoff allowed across the batch (--advanced only)')
+    batch.add_argument('--order', choices=['given', 'shortest', 'longest'], default='given',
+                       help='Fetch order; duration-based orders fetch missing durations first')
+    batch.add_argument('--durations-file', default=None,
+                       help='Playlist listing or {video_id: seconds} JSON to order by')
+    batch.add_argument('--workers', type=int, default=4,
+                       help='Concurrent metadata requests when looking up durations')
+    batch.add_argument('--trace', default=None, metavar='PATH',
+                       help='Write a Chrome trace / Perfetto JSON file of per-video spans')
+    batch.add_argument('--deadline', type=float, default=None, metavar='SECONDS',
+                       help='Stop starting new work after this many seconds and print partial results')
+    batch.add_argument('--request-timeout', type=float, default=None, metavar='SECONDS',
+                       help='Abandon a single video fetch after this many seconds')
+    batch.add_argument('--manifests', action='store_true',
+                       help='Attach a chunk hash diff against the previous fetch to each transcript')
+    batch.set_defaults(handler=run_batch)
+
+    playlist = subparsers.add_parser('playlist', help='List the videos of a playlist as JSON')
+    playlist.add_argument('playlist_url')
+    playlist.add_argument('--enrich', action='store_true',
+                          help='Fetch per-video metadata for videos missing a duration')
+    playlist.add_argument('--workers', type=int, default=4,
+                          help='Concurrent metadata requests when enriching')
+    playlist.add_argument('--trace', default=None, metavar='PATH',
+                          help='Write a Chrome trace / Perfetto JSON file of extractor spans')
+    playlist.add_argument('--prefetch', type=int, default=0, metavar='N',
+                          help='Prefetch the first N transcripts into the local cache in the background')
+    playlist.set_defaults(handler=run_playlist)
+
+    playlists = subparsers.add_parser('playlists', help='List many playlists or channels as JSON Lines')
+    playlists.add_argument('urls', nargs='*')
+    playlists.add_argument('--file', default=None, help='Read URLs from this file, one per line')
+    playlists.add_argument('--workers', type=int, default=4, help='Concurrent listings')
+    playlists.add_argument('--trace', default=None, metavar='PATH',
+                           help='Write a Chrome trace / Perfetto JSON file of extractor spans')
+    playlists.set_defaults(handler=run_playlists)
+
+    prefetch = subparsers.add_parser('prefetch', help='Warm the transcript cache at low priority')
+    prefetch.add_argument('video_ids', nargs='*')
+    prefetch.add_argument('--limit', type=int, default=5, help='Maximum videos to fetch')
+    prefetch.add_argument('--rate', type=float, default=4, help='Maximum upstream requests per minute')
+    prefetch.add_argument('--max-seconds', type=float, default=300,
+                          help='Stop prefetching after this many seconds')
+    prefetch.set_defaults(handler=run_prefetch)
+
+    enqueue = subparsers.add_parser('enqueue', help='Add videos to the durable work queue as one job')
+    enqueue.add_argument('video_ids', nargs='*')
+    enqueue.add_argument('--job-id', required=True)
+    enqueue.add_argument('--queue', default=None, metavar='PATH',
+                         help='Queue database (default: EDUEXTRACT_QUEUE_PATH or the cache dir)')
+    enqueue.set_defaults(handler=run_enqueue)
+
+    worker = subparsers.add_parser('worker', help='Fetch transcripts from the durable work queue')
+    worker.add_argument('--queue', default=None, metavar='PATH',
+                        help='Queue database (default: EDUEXTRACT_QUEUE_PATH or the cache dir)')
+    worker.add_argument('--worker-id', default=None, help='Lease owner name (default: host:pid)')
+    worker.add_argument('--lease-seconds', type=int, default=120,
+                        help='Lease length; renewed by heartbeat while fetching')
+    worker.add_argument('--max-deliveries', type=int, default=3,
+                        help='Times a task is delivered before it is failed for good')
+    worker.add_argument('--delay', type=int, default=None,
+                        help='Base delay in seconds between this worker\'s requests (default: 8)')
+    worker.add_argument('--use-proxy', action='store_true',
+                        help='Rotate through configured proxies')
+    worker.add_argument('--request-timeout', type=float, default=None, metavar='SECONDS',
+                        help='Abandon a single video fetch after this many seconds')
+    worker.add_argument('--forever', action='store_true',
+                        help='Keep polling for new tasks instead of exiting when the queue is empty')
+    worker.set_defaults(handler=run_worker)
+
+    job = subparsers.add_parser('job', help='Print the results of a queued job as JSON')
+    job.add_argument('--job-id', required=True)
+    job.add_argument('--queue', default=None, metavar='PATH',
+                     help='Queue database (default: EDUEXTRACT_QUEUE_PATH or the cache dir)')
+    job.set_defaults(handler=run_job)
+
+    chunks = subparsers.add_parser('chunks', help='Hash text chunks and list which need re-embedding')
+    chunks.add_argument('--source-id', required=True,
+                        help='Stable source identifier, e.g. transcript:<video_id>')
+    chunks.add_argument('--file', default=None, help='Read text from this file instead of stdin')
+    chunks.add_argument('--dry-run', action='store_true',
+                        help='Diff without replacing the stored manifest')
+    chunks.set_defaults(handler=run_chunks)
+
+    ingest = subparsers.add_parser('ingest', help='Cache a caption payload captured by the browser extension')
+    ingest.add_argument('--video-id', required=True)
+    ingest.add_argument('--user-id', required=True, help='User who captured the payload')
+    ingest.add_argument('--format', choices=['json3', 'timedtext'], default=None,
+                        help='Payload format (default: detect)')
+    ingest.add_argument('--file', default=None, help='Read the payload from this file instead of stdin')
+    ingest.set_defaults(handler=run_ingest)
+
+    usage = subparsers.add_parser('usage', help='Show bandwidth used per proxy tier per day')
+    usage.add_argument('--days', type=int, default=7, help='Days of history to show')
+    usage.set_defaults(handler=run_usage)
+
+    bench = subparsers.add_parser('bench', help='Report import-time startup cost per subcommand')
+    bench.add_argument('subcommands', nargs='*',
+                       help=f"Subcommands to measure (default: {', '.join(SUBCOMMANDS)})")
+    bench.add_argument('--runs', type=int, default=3,
+                       help='Fresh interpreter runs per subcommand; the fastest is reported')
+    bench.set_defaults(handler=run_bench)
+
+    return parser
+
+
+def main(argv=None):
+    """Main entry point"""
+    args = build_parser().parse_args(argv)
+    sys.exit(args.handler(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Fetch Pipeline Tracing
+Records timed spans for a fetch run and writes them as Chrome trace JSON
+
+The output opens in chrome://tracing or https://ui.perfetto.dev and shows where
+wall-clock time went per video: listing tracks, fetching, retry backoff, proxy
+setup and serialization. Tracing is off unless a Tracer is passed in; the
+default NULL_TRACER makes every hook a no-op.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Tracer:
+    """Collects spans in Chrome Trace Event format"""
+
+    def __init__(self, process_name='fetch'):
+        self.pid = os.getpid()
+        self.events = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._thread_ids = {}
+        self._add_metadata('process_name', 0, {'name': process_name})
+
+    def _now_us(self):
+        return (time.perf_counter() - self._origin) * 1_000_000
+
+    def _tid(self):
+        # Map OS thread idents to small, stable lane numbers
+        ident = threading.get_ident()
+        with self._lock:
+            if ident not in self._thread_ids:
+                tid = len(self._thread_ids) + 1
+                self._thread_ids[ident] = tid
+                self.events.append({
+                    'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid,
+                    'args': {'name': threading.current_thread().name}
+                })
+            return self._thread_ids[ident]
+
+    def _add_metadata(self, name, tid, args):
+        self.events.append({'name': name, 'ph': 'M', 'pid': self.pid, 'tid': tid, 'args': args})
+
+    @contextmanager
+    def span(self, name, category='fetch', **attributes):
+        """
+        Record a complete span around a block
+
+        Args:
+            name: Span name (e.g. 'fetch_attempt')
+            category: Trace category used for filtering in the viewer
+            **attributes: Extra fields shown in the span's args (e.g. video_id)
+
+        Yields:
+            dict: The span's args; callers may add attributes such as the outcome
+        """
+        tid = self._tid()
+        start = self._now_us()
+        args = dict(attributes)
+        try:
+            yield args
+        except BaseException as e:
+            args.setdefault('error', f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            event = {
+                'name': name, 'cat': category, 'ph': 'X', 'pid': self.pid, 'tid': tid,
+                'ts': start, 'dur': self._now_us() - start, 'args': args
+            }
+            with self._lock:
+                self.events.append(event)
+
+    def instant(self, name, category='fetch', **attributes):
+        """Record a point-in-time event"""
+        event = {
+            'name': name, 'cat': category, 'ph': 'i', 's': 't', 'pid': self.pid,
+            'tid': self._tid(), 'ts': self._now_us(), 'args': attributes
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def write(self, path):
+        """Write the collected events as a Chrome trace JSON file"""
+        with self._lock:
+            events = list(self.events)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+
+
+class NullTracer:
+    """Tracer that records nothing"""
+
+    @contextmanager
+    def span(self, name, category='fetch', **attributes):
+        yield {}
+
+    def instant(self, name, category='fetch', **attributes):
+        pass
+
+    def write(self, path):
+        pass
+
+
+NULL_TRACER = NullTracer()
@@ -4,33 +4,45 @@ Batch Transcript Fetcher
 Fetches transcripts for multiple YouTube videos with delay to avoid rate limiting
 """
 
-from youtube_transcript_api import YouTubeTranscriptApi
 import sys
 import json
-import time
 
-def fetch_single_transcript(video_id):
+from bandwidth_meter import BandwidthMeter, DailyUsageLedger
+from fetch_tracing import NULL_TRACER
+from transcript_cache import get_cached_transcript, store_transcript
+from job_control import (
+    NO_SHUTDOWN, Deadline, GracefulShutdown, ShutdownRequested, call_with_timeout, not_fetched_result
+)
+from proxy_router import DIRECT_ROUTE
+
+def fetch_single_transcript(video_id, tracer=NULL_TRACER):
     """
     Fetch transcript for a single video
     
     Args:
         video_id: YouTube video ID
+        tracer: Optional fetch_tracing.Tracer recording per-stage spans
         
     Returns:
         dict: Contains success status and transcript text or error
     """
+    # Imported here so listing-only callers don't pay for it at startup
+    from youtube_transcript_api import YouTubeTranscriptApi
+
     try:
         # Try different API approaches
         transcript_list = None
         
         # Method 1: Try the newer API with instance
         try:
-            api = YouTubeTranscriptApi()
-            transcript_list = api.fetch(video_id)
+            with tracer.span('api_fetch', video_id=video_id):
+                api = YouTubeTranscriptApi()
+                transcript_list = api.fetch(video_id)
         except Exception as e1:
             # Method 2: Try the older method
             try:
-                transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
+                with tracer.span('get_transcript', video_id=video_id):
+                    transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
             except Exception as e2:
                 raise e2
         
@@ -69,42 +81,102 @@ def fetch_single_transcript(video_id):
             'error_type': type(e).__name__
         }
 
-def fetch_batch_transcripts(video_ids, delay_seconds=5):
+def _metered_fetch(meter, scope, video_id, tracer):
+    # Runs on the request thread, where the meter has to be bound; settling
+    # here charges an abandoned fetch once it actually finishes
+    try:
+        with scope:
+            return fetch_single_transcript(video_id, tracer)
+    finally:
+        meter.settle(scope)
+
+def fetch_batch_transcripts(video_ids, delay_seconds=5, tracer=NULL_TRACER,
+                            request_timeout=None, deadline=None, shutdown=NO_SHUTDOWN):
     """
     Fetch transcripts for multiple videos with delay between requests
     
     Args:
         video_ids: List of YouTube video IDs
         delay_seconds: Delay in seconds between requests (default: 5)
+        tracer: Optional fetch_tracing.Tracer recording per-video spans
+        request_timeout: Seconds before a single video's fetch is abandoned
+        deadline: job_control.Deadline for the whole batch
+        shutdown: job_control.GracefulShutdown; once requested, remaining
+            videos are skipped and the results so far are returned
         
     Returns:
         dict: Results for all videos
     """
+    deadline = deadline or Deadline()
+    # No proxies here, but the direct egress is still metered per job and per day
+    meter = BandwidthMeter(DailyUsageLedger())
     results = {
         'total': len(video_ids),
         'successful': 0,
         'failed': 0,
+        'skipped': 0,
+        'stopped': None,
         'transcripts': {}
     }
     
     for idx, video_id in enumerate(video_ids):
-        # Fetch transcript
-        result = fetch_single_transcript(video_id)
+        if shutdown.requested:
+            results['stopped'] = f"Interrupted by {shutdown.signal_name}"
+        elif deadline.expired():
+            results['stopped'] = 'Job deadline reached'
+        if results['stopped']:
+            # List the videos never fetched so the output stays complete
+            for skipped_id in video_ids[idx:]:
+                results['transcripts'][skipped_id] = not_fetched_result(skipped_id, results['stopped'])
+                results['failed'] += 1
+                results['skipped'] += 1
+            print(f"{results['stopped']}; skipped {len(video_ids) - idx} videos", file=sys.stderr, flush=True)
+            break
+
+        # Fetch transcript, unless an earlier job or prefetch already cached it
+        cached = get_cached_transcript(video_id)
+        with tracer.span('video', video_id=video_id, position=idx + 1) as span:
+            try:
+                if cached:
+                    result = cached
+                else:
+                    scope = meter.open(DIRECT_ROUTE)
+                    result = call_with_timeout(
+                        lambda: _metered_fetch(meter, scope, video_id, tracer),
+                        timeout=deadline.clamp(request_timeout),
+                        shutdown=shutdown
+                    )
+                    store_transcript(video_id, result)
+            except ShutdownRequested:
+                result = not_fetched_result(video_id, 'Interrupted by shutdown')
+            except Exception as e:
+                result = {
+                    'success': False,
+                    'video_id': video_id,
+                    'error': str(e),
+                    'error_type': type(e).__name__
+                }
+            span['success'] = result['success']
         results['transcripts'][video_id] = result
         
         if result['success']:
             results['successful'] += 1
         else:
             results['failed'] += 1
+            if result.get('skipped'):
+                results['skipped'] += 1
         
         # Print progress to stderr for Node.js to track
         print(f"Progress: {idx + 1}/{len(video_ids)} videos processed", file=sys.stderr, flush=True)
         
-        # Add delay between requests (except for the last one)
-        if idx < len(video_ids) - 1:
+        # Add delay between requests (except for the last one, or after a cache hit)
+        if idx < len(video_ids) - 1 and not cached:
             print(f"Waiting {delay_seconds} seconds before next request...", file=sys.stderr, flush=True)
-            time.sleep(delay_seconds)
+            with tracer.span('request_spacing', wait_seconds=delay_seconds):
+                shutdown.sleep(deadline.clamp(delay_seconds))
     
+    meter.settle_all()
+    results['bandwidth'] = meter.to_dict()
     return results
 
 def main():
@@ -141,8 +213,8 @@ def main():
         }))
         sys.exit(1)
     
-    # Fetch transcripts
-    results = fetch_batch_transcripts(video_ids, delay_seconds)
+    # Fetch transcripts; SIGTERM/SIGINT stop the batch and still print results
+    results = fetch_batch_transcripts(video_ids, delay_seconds, shutdown=GracefulShutdown().install())
     
     # Output results as JSON
     print(json.dumps(results, ensure_ascii=False))
@@ -4,19 +4,20 @@ Advanced Batch Transcript Fetcher with Multiple IP Rotation Strategies
 Supports: Proxy rotation, Request spacing, User-agent rotation, and Chunking
 """
 
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api._errors import TranscriptsDisabled, NoTranscriptFound
 import sys
 import json
-import time
 import random
-import os
 
-try:
-    from proxy_config import get_proxy_list
-    PROXY_LIST = get_proxy_list()
-except ImportError:
-    PROXY_LIST = []
+from bandwidth_meter import BandwidthMeter, DailyUsageLedger
+from fetch_tracing import NULL_TRACER
+from job_control import (
+    NO_SHUTDOWN, Deadline, GracefulShutdown, ShutdownRequested, call_with_timeout, not_fetched_result
+)
+from proxy_router import ProxyRouter, load_routes
+from transcript_cache import get_cached_transcript, store_transcript
+from retry_policy import (
+    DEFER, FAIL, PERMANENT, TRANSIENT, RetryBudget, RetryPolicy, classify_error
+)
 
 # User agents for rotation to avoid detection
 USER_AGENTS = [
@@ -31,20 +32,31 @@ USER_AGENTS = [
 class TranscriptFetcher:
     """Advanced transcript fetcher with multiple strategies to avoid rate limiting"""
     
-    def __init__(self, use_proxy=False, chunk_size=5, base_delay=8):
+    def __init__(self, use_proxy=False, chunk_size=5, base_delay=8, tracer=None,
+                 max_extra_request_ratio=0.25, max_backoff_seconds=300,
+                 request_timeout=None, deadline=None, shutdown=None,
+                 use_cache=True, cache_source='server', interactive=False):
         self.use_proxy = use_proxy
         self.chunk_size = chunk_size  # Process videos in chunks
         self.base_delay = base_delay
-        self.proxy_index = 0
         self.request_count = 0
-        
-    def get_next_proxy(self):
-        """Get next proxy from the list in round-robin fashion"""
-        if not PROXY_LIST:
-            return None
-        proxy = PROXY_LIST[self.proxy_index % len(PROXY_LIST)]
-        self.proxy_index += 1
-        return proxy
+        self.tracer = tracer or NULL_TRACER
+        # Batch-wide retry budget; fetch_batch() installs a fresh one per batch
+        self.max_extra_request_ratio = max_extra_request_ratio
+        self.max_backoff_seconds = max_backoff_seconds
+        self.retry_policy = RetryPolicy()
+        # Time bounds: per-request timeout, whole-job deadline and signal handling
+        self.request_timeout = request_timeout
+        self.deadline = deadline or Deadline()
+        self.shutdown = shutdown or NO_SHUTDOWN
+        # Local transcript cache, read before and written after network fetches
+        self.use_cache = use_cache
+        self.cache_source = cache_source
+        # Egress routing and byte metering; premium proxies only with use_proxy
+        self.interactive = interactive
+        ledger = DailyUsageLedger()
+        self.meter = BandwidthMeter(ledger)
+        self.router = ProxyRouter(load_routes() if use_proxy else [], ledger=ledger)
     
     def get_random_user_agent(self):
         """Get a random user agent"""
@@ -69,146 +81,336 @@ class TranscriptFetcher:
         total_delay = (self.base_delay * chunk_multiplier * retry_multiplier) + random_delay
         return max(3, total_delay)  # Minimum 3 seconds
     
-    def fetch_single_transcript(self, video_id, retry_count=3):
+    def wait(self, seconds):
+        """
+        Sleep for seconds, cut short by the job deadline or a shutdown request
+
+        Returns:
+            bool: True if the job should stop (shutdown requested or deadline hit)
+        """
+        if self.shutdown.sleep(self.deadline.clamp(seconds)):
+            return True
+        return self.deadline.expired()
+
+    def fetch_single_transcript(self, video_id, retry_count=3, allow_defer=False, is_retry=False):
         """
         Fetch transcript for a single video with advanced retry logic
         
+        Errors are classified by the retry policy: permanent errors fail
+        immediately, while throttled and transient errors are retried in place
+        only while the batch retry budget allows.
+        
         Args:
             video_id: YouTube video ID
-            retry_count: Number of retries on failure
+            retry_count: Maximum attempts for this video in this pass
+            allow_defer: Return a deferred result instead of retrying when the
+                policy prefers a later pass
+            is_retry: The video already failed once (deferred pass or redelivery),
+                so premium routes may be used for the first attempt too
             
         Returns:
             dict: Contains success status and transcript text or error
         """
+        if self.use_cache:
+            cached = get_cached_transcript(video_id)
+            if cached:
+                return cached
+
         last_error = None
+        attempts = 0
         
         for attempt in range(retry_count):
+            attempts = attempt + 1
+            route = self.router.choose(retry=is_retry or attempt > 0, interactive=self.interactive)
+            scope = self.meter.open(route)
             try:
-                # Rotate proxy on each attempt if enabled
-                if self.use_proxy and PROXY_LIST:
-                    proxy = self.get_next_proxy()
-                    print(f"Attempt {attempt + 1}: Using proxy rotation", file=sys.stderr, flush=True)
-                    # Note: youtube_transcript_api doesn't natively support proxies
-                    # For true proxy support, you'd need to modify the library or use environment variables
-                    os.environ['HTTP_PROXY'] = proxy
-                    os.environ['HTTPS_PROXY'] = proxy
-                
-                # Try to fetch transcript
-                transcript_list = None
-                
-                # Method 1: Try standard method
-                try:
-                    transcript_list = YouTubeTranscriptApi.get_transcript(video_id)
-                except Exception as e1:
-                    # Method 2: Try with language preferences
-                    try:
-                        transcript_list = YouTubeTranscriptApi.get_transcript(
-                            video_id, 
-                            languages=['en', 'en-US', 'en-GB', 'auto']
-                        )
-                    except Exception as e2:
-                        # Method 3: Try to list available transcripts
-                        try:
-                            transcript_list_data = YouTubeTranscriptApi.list_transcripts(video_id)
-                            # Get first available transcript
-                            transcript = next(iter(transcript_list_data))
-                            transcript_list = transcript.fetch()
-                        except Exception as e3:
-                            raise e3
-                
-                if transcript_list is None or len(transcript_list) == 0:
-                    raise Exception("No transcript data retrieved")
-                
-                # Extract text from transcript
-                full_transcript_text = ""
-                
-                if isinstance(transcript_list[0], dict) and 'text' in transcript_list[0]:
-                    # Dictionary format
-                    full_transcript_text = " ".join([snippet['text'] for snippet in transcript_list])
-                elif hasattr(transcript_list[0], 'text'):
-                    # Object format
-                    full_transcript_text = " ".join([segment.text for segment in transcript_list])
-                else:
-                    # Fallback
-                    full_transcript_text = " ".join([str(segment) for segment in transcript_list])
-                
-                self.request_count += 1
-                
-                return {
-                    'success': True,
-                    'video_id': video_id,
-                    'text': full_transcript_text,
-                    'segment_count': len(transcript_list),
-                    'attempt': attempt + 1
-                }
-                
-            except (TranscriptsDisabled, NoTranscriptFound) as e:
-                # These errors won't benefit from retry
-                return {
-                    'success': False,
-                    'video_id': video_id,
-                    'error': f"No transcript available: {str(e)}",
-                    'error_type': type(e).__name__
-                }
+                with self.tracer.span('fetch_attempt', video_id=video_id, attempt=attempt + 1,
+                                      route=route.name) as span:
+                    result = call_with_timeout(
+                        lambda: self._fetch_attempt(video_id, attempt, scope),
+                        timeout=self.deadline.clamp(self.request_timeout),
+                        shutdown=self.shutdown
+                    )
+                    span['segment_count'] = result['segment_count']
+                    span['bytes'] = scope.total_bytes
+                result['route'] = route.name
+                self.router.report(route, True)
+                if self.use_cache:
+                    store_transcript(video_id, result, source=self.cache_source)
+                return result
+
+            except ShutdownRequested:
+                return not_fetched_result(video_id, 'Interrupted by shutdown', attempts=attempts)
             except Exception as e:
                 last_error = e
-                if attempt < retry_count - 1:
-                    wait_time = self.calculate_delay(attempt)
-                    print(f"Attempt {attempt + 1} failed for {video_id}: {str(e)}", 
-                          file=sys.stderr, flush=True)
-                    print(f"Retrying in {wait_time:.1f}s...", file=sys.stderr, flush=True)
-                    time.sleep(wait_time)
-                continue
-            finally:
-                # Clear proxy environment variables
-                if 'HTTP_PROXY' in os.environ:
-                    del os.environ['HTTP_PROXY']
-                if 'HTTPS_PROXY' in os.environ:
-                    del os.environ['HTTPS_PROXY']
+                error_class = classify_error(e)
+                # A permanent error is still an answer from YouTube, so the route worked
+                self.router.report(route, error_class == PERMANENT)
+
+                if error_class == PERMANENT:
+                    # These errors won't benefit from retry
+                    no_transcript = type(e).__name__ in ('TranscriptsDisabled', 'NoTranscriptFound')
+                    return {
+                        'success': False,
+                        'video_id': video_id,
+                        'error': f"{'No transcript available' if no_transcript else 'Permanent error'}: {str(e)}",
+                        'error_type': type(e).__name__,
+                        'error_class': error_class,
+                        'attempts': attempts
+                    }
+
+                if attempt == retry_count - 1:
+                    break
+
+                wait_time = self.calculate_delay(attempt)
+                decision = self.retry_policy.decide(error_class, wait_time, allow_defer=allow_defer)
+                if decision != FAIL and not self.deadline.allows(wait_time):
+                    # No time left to retry in place before the job deadline
+                    decision = DEFER if allow_defer else FAIL
+                print(f"Attempt {attempt + 1} failed for {video_id} ({error_class}): {str(e)}", 
+                      file=sys.stderr, flush=True)
+
+                if decision == DEFER:
+                    print(f"Deferring {video_id} to a later pass", file=sys.stderr, flush=True)
+                    self.tracer.instant('deferred', video_id=video_id, attempt=attempt + 1,
+                                        error_class=error_class)
+                    return {
+                        'success': False,
+                        'video_id': video_id,
+                        'error': str(e),
+                        'error_type': type(e).__name__,
+                        'error_class': error_class,
+                        'attempts': attempts,
+                        'deferred': True
+                    }
+                if decision == FAIL:
+                    print(f"Retry budget exhausted, giving up on {video_id}", file=sys.stderr, flush=True)
+                    self.tracer.instant('retry_budget_exhausted', video_id=video_id, attempt=attempt + 1,
+                                        error_class=error_class)
+                    break
+
+                self.retry_policy.spend(wait_time)
+                print(f"Retrying in {wait_time:.1f}s...", file=sys.stderr, flush=True)
+                with self.tracer.span('retry_backoff', video_id=video_id, attempt=attempt + 1,
+                                      wait_seconds=round(wait_time, 2), error_class=error_class):
+                    if self.wait(wait_time):
+                        return not_fetched_result(
+                            video_id, self.stop_reason() or 'Interrupted during backoff',
+                            attempts=attempts, last_error=str(e)
+                        )
         
         return {
             'success': False,
             'video_id': video_id,
             'error': str(last_error),
             'error_type': type(last_error).__name__,
-            'attempts': retry_count
+            'error_class': classify_error(last_error),
+            'attempts': attempts
         }
     
+    def _fetch_attempt(self, video_id, attempt, scope):
+        """
+        Run a single fetch attempt, recording a tracing span for each stage
+
+        Args:
+            video_id: YouTube video ID
+            attempt: Zero-based attempt number
+            scope: MeterScope for the route chosen for this attempt
+
+        Returns:
+            dict: Successful result with transcript text
+        """
+        try:
+            with scope:
+                return self._fetch_via_route(video_id, attempt, scope.route)
+        finally:
+            # Runs on the request thread, so an attempt call_with_timeout gave up
+            # on is still charged with everything it sent once it finishes
+            self.meter.settle(scope)
+
+    def _fetch_via_route(self, video_id, attempt, route):
+        from youtube_transcript_api import YouTubeTranscriptApi
+
+        # Passed per request: an abandoned attempt may still be running on its
+        # own thread, so process-wide proxy settings would leak between routes
+        proxies = None
+        if route.url:
+            print(f"Attempt {attempt + 1}: Using {route.tier} proxy {route.name}", file=sys.stderr, flush=True)
+            proxies = {'http': route.url, 'https': route.url}
+
+        # Try to fetch transcript
+        transcript_list = None
+
+        # Method 1: Try standard method
+        try:
+            with self.tracer.span('get_transcript', video_id=video_id):
+                transcript_list = YouTubeTranscriptApi.get_transcript(video_id, proxies=proxies)
+        except Exception as e1:
+            if type(e1).__name__ == 'NoTranscriptFound':
+                # Only another language can help; listing them is not a retry
+                transcript_list = self._fetch_any_track(YouTubeTranscriptApi, video_id, proxies)
+            else:
+                # Method 2: Try with language preferences
+                self._charge_fallback(e1)
+                try:
+                    with self.tracer.span('get_transcript', video_id=video_id, languages='en,en-US,en-GB,auto'):
+                        transcript_list = YouTubeTranscriptApi.get_transcript(
+                            video_id, 
+                            languages=['en', 'en-US', 'en-GB', 'auto'],
+                            proxies=proxies
+                        )
+                except Exception as e2:
+                    if type(e2).__name__ != 'NoTranscriptFound':
+                        # Failed twice in a row; leave it to the retry loop
+                        raise
+                    # Method 3: Try to list available transcripts
+                    transcript_list = self._fetch_any_track(YouTubeTranscriptApi, video_id, proxies)
+
+        if transcript_list is None or len(transcript_list) == 0:
+            raise Exception("No transcript data retrieved")
+
+        # Extract text from transcript
+        with self.tracer.span('join_text', video_id=video_id, segment_count=len(transcript_list)):
+            full_transcript_text = ""
+
+            if isinstance(transcript_list[0], dict) and 'text' in transcript_list[0]:
+                # Dictionary format
+                full_transcript_text = " ".join([snippet['text'] for snippet in transcript_list])
+            elif hasattr(transcript_list[0], 'text'):
+                # Object format
+                full_transcript_text = " ".join([segment.text for segment in transcript_list])
+            else:
+                # Fallback
+                full_transcript_text = " ".join([str(segment) for segment in transcript_list])
+
+        self.request_count += 1
+
+        return {
+            'success': True,
+            'video_id': video_id,
+            'text': full_transcript_text,
+            'segment_count': len(transcript_list),
+            'attempt': attempt + 1
+        }
+    
+    def _charge_fallback(self, error):
+        """
+        Allow a fallback request after a transient error, charging it to the retry budget
+
+        After a transient error the fallback is in effect a retry, so it counts
+        against the same batch budget as in-place retries. Throttled and
+        permanent errors are re-raised: another method would hit the same wall.
+        (The listing fallback after NoTranscriptFound is how non-English videos
+        are fetched at all, so it is never charged.)
+
+        Raises:
+            error: When the fallback isn't worth it or the budget is spent
+        """
+        if classify_error(error) != TRANSIENT:
+            raise error
+        if not self.retry_policy.can_spend():
+            raise error
+        self.retry_policy.spend(0)
+
+    def _fetch_any_track(self, api, video_id, proxies=None):
+        """Method 3: fetch the first transcript track in any language"""
+        with self.tracer.span('list_transcripts', video_id=video_id):
+            transcript_list_data = api.list_transcripts(video_id, proxies=proxies)
+            # Get first available transcript
+            transcript = next(iter(transcript_list_data))
+        with self.tracer.span('fetch_track', video_id=video_id,
+                              language=getattr(transcript, 'language_code', None)):
+            return transcript.fetch()
+
+    def stop_reason(self):
+        """Why the job must stop early, or None to keep going"""
+        if self.shutdown.requested:
+            return f"Interrupted by {self.shutdown.signal_name}"
+        if self.deadline.expired():
+            return 'Job deadline reached'
+        return None
+
+    def _skip_remaining(self, results, video_ids, reason):
+        """Mark videos that were never fetched so the output still lists them"""
+        for video_id in video_ids:
+            self._record_result(results, video_id, not_fetched_result(video_id, reason))
+            results['skipped'] += 1
+        results['stopped'] = reason
+        self.tracer.instant('job_stopped', reason=reason, skipped=len(video_ids))
+
+    def _record_result(self, results, video_id, result):
+        """Store a final (non-deferred) result and log it"""
+        results['transcripts'][video_id] = result
+        if result['success']:
+            results['successful'] += 1
+            print(f"✓ Success: {video_id}", file=sys.stderr, flush=True)
+        else:
+            results['failed'] += 1
+            print(f"✗ Failed: {video_id} - {result.get('error', 'Unknown error')}", 
+                  file=sys.stderr, flush=True)
+
     def fetch_batch(self, video_ids):
         """
         Fetch transcripts for multiple videos with intelligent spacing
         
+        Videos the retry policy defers (throttled, or out of in-place retry
+        budget) are fetched once more in a deferred pass after a cool-down,
+        as long as the batch retry budget still allows an extra request.
+        
         Args:
             video_ids: List of YouTube video IDs
             
         Returns:
             dict: Results for all videos
         """
+        budget = RetryBudget(
+            len(video_ids),
+            max_extra_request_ratio=self.max_extra_request_ratio,
+            max_backoff_seconds=self.max_backoff_seconds
+        )
+        self.retry_policy = RetryPolicy(budget)
+
         results = {
             'total': len(video_ids),
             'successful': 0,
             'failed': 0,
+            'deferred': 0,
+            'skipped': 0,
+            'stopped': None,
             'transcripts': {}
         }
+        deferred = []
         
         for idx, video_id in enumerate(video_ids):
+            reason = self.stop_reason()
+            if reason:
+                print(f"\n{reason}; skipping {len(video_ids) - idx} remaining videos",
+                      file=sys.stderr, flush=True)
+                self._skip_remaining(results, video_ids[idx:] + deferred, reason)
+                deferred = []
+                break
+
             print(f"\nProcessing video {idx + 1}/{len(video_ids)}: {video_id}", 
                   file=sys.stderr, flush=True)
             
             # Fetch transcript
-            result = self.fetch_single_transcript(video_id)
-            results['transcripts'][video_id] = result
-            
-            if result['success']:
-                results['successful'] += 1
-                print(f"✓ Success: {video_id}", file=sys.stderr, flush=True)
+            with self.tracer.span('video', video_id=video_id, position=idx + 1) as span:
+                result = self.fetch_single_transcript(video_id, allow_defer=True)
+                span['success'] = result['success']
+                span['deferred'] = result.get('deferred', False)
+
+            if result.get('skipped'):
+                self._record_result(results, video_id, result)
+                results['skipped'] += 1
+            elif result.get('deferred'):
+                deferred.append(video_id)
+                results['transcripts'][video_id] = result
+                print(f"↻ Deferred: {video_id}", file=sys.stderr, flush=True)
             else:
-                results['failed'] += 1
-                print(f"✗ Failed: {video_id} - {result.get('error', 'Unknown error')}", 
-                      file=sys.stderr, flush=True)
+                self._record_result(results, video_id, result)
             
-            # Add delay between requests (except for the last one)
-            if idx < len(video_ids) - 1:
+            # Add delay between requests (except for the last one, or after a cache hit)
+            if idx < len(video_ids) - 1 and not result.get('cached'):
                 # Extra long delay every chunk_size videos
                 if (idx + 1) % self.chunk_size == 0:
                     chunk_delay = self.calculate_delay() * 2
@@ -218,20 +420,83 @@ class TranscriptFetcher:
                     print(f"Waiting {chunk_delay:.1f} seconds before next chunk", 
                           file=sys.stderr, flush=True)
                     print(f"{'='*50}\n", file=sys.stderr, flush=True)
-                    time.sleep(chunk_delay)
+                    with self.tracer.span('chunk_break', wait_seconds=round(chunk_delay, 2)):
+                        self.wait(chunk_delay)
                 else:
                     delay = self.calculate_delay()
                     print(f"Waiting {delay:.1f} seconds...", file=sys.stderr, flush=True)
-                    time.sleep(delay)
-        
+                    with self.tracer.span('request_spacing', wait_seconds=round(delay, 2)):
+                        self.wait(delay)
+
+        results['deferred'] = len(deferred)
+        if deferred and results['stopped'] is None:
+            self._fetch_deferred(deferred, results, budget)
+
+        results['retry_budget'] = budget.to_dict()
+        results['bandwidth'] = self.bandwidth_report(results['successful'])
         return results
 
+    def bandwidth_report(self, successful=None):
+        """Bytes and estimated cost of this fetcher's requests, per route"""
+        # Attempts abandoned on timeout may still be running; charge what they used so far
+        self.meter.settle_all()
+        report = self.meter.to_dict()
+        report['routing'] = self.router.to_dict()
+        if successful:
+            report['bytes_per_transcript'] = report['total_bytes'] // successful
+            if report['estimated_cost']:
+                report['transcripts_per_dollar'] = round(successful / report['estimated_cost'], 2)
+        return report
+
+    def _fetch_deferred(self, video_ids, results, budget):
+        """
+        Give each deferred video one more attempt after a cool-down
+
+        Each attempt is an extra request charged to the batch budget; videos
+        that no longer fit are failed instead of fetched.
+        """
+        cooldown = self.calculate_delay() * 2
+        print(f"\nDeferred pass: {len(video_ids)} videos after {cooldown:.1f}s cool-down",
+              file=sys.stderr, flush=True)
+        with self.tracer.span('deferred_cooldown', wait_seconds=round(cooldown, 2)):
+            self.wait(cooldown)
+
+        for idx, video_id in enumerate(video_ids):
+            reason = self.stop_reason()
+            if reason:
+                self._skip_remaining(results, video_ids[idx:], reason)
+                return
+
+            previous = results['transcripts'][video_id]
+            if not budget.can_spend():
+                self.tracer.instant('retry_budget_exhausted', video_id=video_id, deferred_pass=True)
+                self._record_result(results, video_id, {
+                    **previous,
+                    'deferred': False,
+                    'error': f"Retry budget exhausted: {previous.get('error')}"
+                })
+                continue
+
+            budget.spend()
+            with self.tracer.span('video', video_id=video_id, deferred_pass=True) as span:
+                result = self.fetch_single_transcript(video_id, allow_defer=False, is_retry=True)
+                span['success'] = result['success']
+            result['attempts'] = result.get('attempts', result.get('attempt', 1)) + previous.get('attempts', 0)
+            self._record_result(results, video_id, result)
+            if result.get('skipped'):
+                results['skipped'] += 1
+
+            if idx < len(video_ids) - 1 and not result.get('cached'):
+                delay = self.calculate_delay()
+                with self.tracer.span('request_spacing', wait_seconds=round(delay, 2)):
+                    self.wait(delay)
+
 def main():
     """Main entry point"""
     if len(sys.argv) < 2:
         print(json.dumps({
             'success': False,
-            'error': 'Usage: python get_batch_transcripts_advanced.py [--delay=N] [--chunk-size=N] [--use-proxy] video_id1 video_id2 ...'
+            'error': 'Usage: python get_batch_transcripts_advanced.py [--delay=N] [--chunk-size=N] [--retry-budget-ratio=R] [--retry-budget-seconds=N] [--use-proxy] video_id1 video_id2 ...'
         }))
         sys.exit(1)
     
@@ -240,6 +505,8 @@ def main():
     base_delay = 8
     chunk_size = 5
     use_proxy = False
+    max_extra_request_ratio = 0.25
+    max_backoff_seconds = 300
     
     for arg in sys.argv[1:]:
         if arg.startswith('--delay='):
@@ -252,6 +519,16 @@ def main():
                 chunk_size = int(arg.split('=')[1])
             except:
                 pass
+        elif arg.startswith('--retry-budget-ratio='):
+            try:
+                max_extra_request_ratio = float(arg.split('=')[1])
+            except:
+                pass
+        elif arg.startswith('--retry-budget-seconds='):
+            try:
+                max_backoff_seconds = int(arg.split('=')[1])
+            except:
+                pass
         elif arg == '--use-proxy':
             use_proxy = True
         else:
@@ -268,16 +545,22 @@ def main():
     fetcher = TranscriptFetcher(
         use_proxy=use_proxy,
         chunk_size=chunk_size,
-        base_delay=base_delay
+        base_delay=base_delay,
+        max_extra_request_ratio=max_extra_request_ratio,
+        max_backoff_seconds=max_backoff_seconds,
+        shutdown=GracefulShutdown().install()
     )
     
     print(f"\nStarting batch transcript fetch:", file=sys.stderr, flush=True)
     print(f"- Total videos: {len(video_ids)}", file=sys.stderr, flush=True)
     print(f"- Base delay: {base_delay}s", file=sys.stderr, flush=True)
     print(f"- Chunk size: {chunk_size}", file=sys.stderr, flush=True)
+    print(f"- Retry budget: {max_extra_request_ratio:.0%} extra requests, {max_backoff_seconds}s backoff",
+          file=sys.stderr, flush=True)
     print(f"- Proxy enabled: {use_proxy}", file=sys.stderr, flush=True)
     if use_proxy:
-        print(f"- Available proxies: {len(PROXY_LIST)}", file=sys.stderr, flush=True)
+        print(f"- Free routes: {len(fetcher.router.free_routes)}, premium routes: {len(fetcher.router.premium_routes)}",
+              file=sys.stderr, flush=True)
     print("", file=sys.stderr, flush=True)
     
     results = fetcher.fetch_batch(video_ids)
@@ -287,6 +570,7 @@ def main():
     print(f"Batch complete!", file=sys.stderr, flush=True)
     print(f"Successful: {results['successful']}/{results['total']}", file=sys.stderr, flush=True)
     print(f"Failed: {results['failed']}/{results['total']}", file=sys.stderr, flush=True)
+    print(f"Deferred to second pass: {results['deferred']}", file=sys.stderr, flush=True)
     print(f"{'='*50}\n", file=sys.stderr, flush=True)
     
     print(json.dumps(results, ensure_ascii=False))
@@ -2,65 +2,82 @@
 """
 Playlist Information Extractor
 Extracts all video IDs and metadata from a YouTube playlist without using API
+
+Channel URLs (/@handle, /channel/ID, /c/name, /user/name) are listed through
+their videos tab, and list_playlists_bulk() lists many playlists and channels
+at once for institutional imports.
 """
 
+import re
 import sys
 import json
-import yt_dlp
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+from fetch_cache import JsonFileCache
+from fetch_tracing import NULL_TRACER
+from job_control import NO_SHUTDOWN
+
+# Per-video metadata rarely changes; keep it for a week
+METADATA_CACHE_TTL = 7 * 24 * 3600
+
+PLAYLIST_YDL_OPTS = {
+    'quiet': True,
+    'no_warnings': True,
+    'extract_flat': True,  # Don't download, just get metadata
+    'force_generic_extractor': False,
+    'ignoreerrors': True,  # Continue on errors
+}
+
+METADATA_YDL_OPTS = {
+    'quiet': True,
+    'no_warnings': True,
+    'skip_download': True,
+    'ignoreerrors': True,
+}
+
+CHANNEL_URL_PATTERN = re.compile(r'youtube\.com/((?:@|channel/|c/|user/)[^/?#]+)(/[^?#]*)?', re.IGNORECASE)
+
+def normalize_listing_url(url):
+    """
+    Check that a URL can be listed and point channel roots at their videos tab
+    
+    Returns:
+        str: URL to pass to the extractor, or None if it is neither a playlist nor a channel
+    """
+    url = url.strip()
+    if 'list=' in url:
+        return url
+    match = CHANNEL_URL_PATTERN.search(url)
+    if not match:
+        return None
+    if match.group(2) in (None, '', '/'):
+        # The channel root lists its tabs, not its videos
+        return f"https://www.youtube.com/{match.group(1)}/videos"
+    return url
 
-def get_playlist_videos(playlist_url):
+def get_playlist_videos(playlist_url, tracer=NULL_TRACER, ydl=None):
     """
     Extract all video IDs and metadata from a YouTube playlist
     
     Args:
-        playlist_url: YouTube playlist URL
+        playlist_url: YouTube playlist or channel videos URL
+        tracer: Optional fetch_tracing.Tracer recording extractor spans
+        ydl: Optional yt_dlp.YoutubeDL instance to reuse
         
     Returns:
         dict: Playlist information including video IDs, titles, and metadata
     """
+    # yt_dlp is the slowest import in the fetch layer, so only load it here
+    with tracer.span('import_yt_dlp', category='startup'):
+        import yt_dlp
+
     try:
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': True,  # Don't download, just get metadata
-            'force_generic_extractor': False,
-            'ignoreerrors': True,  # Continue on errors
-        }
-        
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(playlist_url, download=False)
-            
-            if not info:
-                return {
-                    'success': False,
-                    'error': 'Could not extract playlist information'
-                }
-            
-            result = {
-                'success': True,
-                'playlist_title': info.get('title', 'Unknown Playlist'),
-                'playlist_id': info.get('id', ''),
-                'uploader': info.get('uploader', 'Unknown'),
-                'video_count': 0,
-                'videos': []
-            }
-            
-            # Extract video information
-            if 'entries' in info:
-                for idx, entry in enumerate(info['entries']):
-                    if entry:  # Sometimes entries can be None for unavailable videos
-                        video_info = {
-                            'id': entry.get('id', ''),
-                            'title': entry.get('title', 'Unknown Title'),
-                            'duration': entry.get('duration', 0),
-                            'position': idx + 1,
-                            'url': f"https://www.youtube.com/watch?v={entry.get('id', '')}"
-                        }
-                        result['videos'].append(video_info)
-                
-                result['video_count'] = len(result['videos'])
-            
-            return result
+        if ydl is None:
+            with yt_dlp.YoutubeDL(PLAYLIST_YDL_OPTS) as own_ydl:
+                return _extract_playlist(own_ydl, playlist_url, tracer)
+        return _extract_playlist(ydl, playlist_url, tracer)
             
     except Exception as e:
         return {
@@ -68,6 +85,270 @@ def get_playlist_videos(playlist_url):
             'error': str(e)
         }
 
+def _extract_playlist(ydl, playlist_url, tracer):
+    with tracer.span('extract_playlist', category='playlist', url=playlist_url) as span:
+        info = ydl.extract_info(playlist_url, download=False)
+        span['entries'] = len(info.get('entries') or []) if info else 0
+    
+    if not info:
+        return {
+            'success': False,
+            'error': 'Could not extract playlist information'
+        }
+    
+    result = {
+        'success': True,
+        'playlist_title': info.get('title', 'Unknown Playlist'),
+        'playlist_id': info.get('id', ''),
+        'uploader': info.get('uploader', 'Unknown'),
+        'video_count': 0,
+        'videos': []
+    }
+    
+    # Extract video information
+    if 'entries' in info:
+        for idx, entry in enumerate(info['entries']):
+            if entry:  # Sometimes entries can be None for unavailable videos
+                video_info = {
+                    'id': entry.get('id', ''),
+                    'title': entry.get('title', 'Unknown Title'),
+                    'duration': entry.get('duration', 0),
+                    'position': idx + 1,
+                    'url': f"https://www.youtube.com/watch?v={entry.get('id', '')}"
+                }
+                result['videos'].append(video_info)
+        
+        result['video_count'] = len(result['videos'])
+    
+    return result
+
+def fetch_video_metadata(video_id, ydl=None):
+    """
+    Fetch full metadata for a single video (duration, title, captions)
+
+    Args:
+        video_id: YouTube video ID
+        ydl: Optional yt_dlp.YoutubeDL instance to reuse
+
+    Returns:
+        dict: Metadata subset used for scheduling, or an error entry
+    """
+    import yt_dlp
+
+    try:
+        if ydl is None:
+            with yt_dlp.YoutubeDL(METADATA_YDL_OPTS) as own_ydl:
+                info = own_ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
+        else:
+            info = ydl.extract_info(f"https://www.youtube.com/watch?v={video_id}", download=False)
+
+        if not info:
+            return {'success': False, 'id': video_id, 'error': 'Could not extract video information'}
+
+        return {
+            'success': True,
+            'id': video_id,
+            'title': info.get('title', 'Unknown Title'),
+            'duration': info.get('duration') or 0,
+            'has_subtitles': bool(info.get('subtitles')),
+            'has_automatic_captions': bool(info.get('automatic_captions')),
+        }
+
+    except Exception as e:
+        return {'success': False, 'id': video_id, 'error': str(e)}
+
+
+@contextmanager
+def per_thread_ydl(ydl_opts):
+    """
+    Give each worker thread its own YoutubeDL, closing them all on exit
+
+    YoutubeDL instances are not thread-safe, so pooled workers can't share
+    one; each thread creates its instance on first use and reuses it after.
+
+    Args:
+        ydl_opts: Options for every instance
+
+    Yields:
+        callable: Returns the calling thread's YoutubeDL instance
+    """
+    import yt_dlp
+
+    local = threading.local()
+    instances = []
+    instances_lock = threading.Lock()
+
+    def get_ydl():
+        if not hasattr(local, 'ydl'):
+            local.ydl = yt_dlp.YoutubeDL(ydl_opts)
+            with instances_lock:
+                instances.append(local.ydl)
+        return local.ydl
+
+    try:
+        yield get_ydl
+    finally:
+        for ydl in instances:
+            ydl.close()
+
+
+def enrich_playlist_videos(videos, max_workers=4, use_cache=True, tracer=NULL_TRACER,
+                           shutdown=NO_SHUTDOWN, deadline=None):
+    """
+    Fill in per-video metadata missing from a flat playlist listing
+
+    extract_flat listings often report duration as 0 or None. This fetches the
+    full metadata for those videos concurrently with bounded parallelism, using
+    one YoutubeDL instance per worker thread and the local metadata cache.
+
+    Args:
+        videos: List of video dicts as returned in get_playlist_videos()['videos']
+        max_workers: Maximum concurrent metadata requests
+        use_cache: Read and write the local metadata cache
+        tracer: Optional fetch_tracing.Tracer recording one span per video
+        shutdown: GracefulShutdown; once requested, no further videos are fetched
+        deadline: Optional Deadline; once expired, no further videos are fetched
+
+    Returns:
+        dict: Counts of enriched, cached, failed and skipped videos (videos are updated in place)
+    """
+    cache = JsonFileCache('video_metadata', ttl_seconds=METADATA_CACHE_TTL) if use_cache else None
+    stats = {'enriched': 0, 'cached': 0, 'failed': 0, 'skipped': 0}
+    pending = []
+
+    for video in videos:
+        if video.get('duration'):
+            continue
+        cached = cache.get(video['id']) if cache else None
+        if cached:
+            video['duration'] = cached.get('duration') or 0
+            stats['cached'] += 1
+        else:
+            pending.append(video)
+
+    if not pending:
+        return stats
+
+    def stopping():
+        return shutdown.requested or (deadline is not None and deadline.expired())
+
+    def worker(video):
+        if stopping():
+            return video, None
+        with tracer.span('video_metadata', category='playlist', video_id=video['id']) as span:
+            metadata = fetch_video_metadata(video['id'], ydl=get_ydl())
+            span['success'] = metadata['success']
+        return video, metadata
+
+    with per_thread_ydl(METADATA_YDL_OPTS) as get_ydl, \
+            ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='metadata') as executor:
+        futures = [executor.submit(worker, video) for video in pending]
+        for future in futures:
+            if stopping():
+                # Drop queued lookups; at most max_workers are still in flight
+                for queued in futures:
+                    queued.cancel()
+                print("Stopped enriching: shutdown requested or deadline reached",
+                      file=sys.stderr, flush=True)
+                break
+            video, metadata = future.result()
+            if metadata is None:
+                continue
+            if metadata['success']:
+                video['duration'] = metadata['duration']
+                if cache:
+                    cache.set(video['id'], metadata)
+                stats['enriched'] += 1
+            else:
+                stats['failed'] += 1
+            print(f"Enriched {video['id']}: duration={video.get('duration') or 'unknown'}",
+                  file=sys.stderr, flush=True)
+
+    stats['skipped'] = len(pending) - stats['enriched'] - stats['failed']
+    return stats
+
+
+def list_playlists_bulk(playlist_urls, max_workers=4, tracer=NULL_TRACER):
+    """
+    List many playlists and channels concurrently, de-duplicating their videos
+
+    Listings run with bounded parallelism, and each worker thread keeps one
+    YoutubeDL instance for every listing it runs instead of one per URL.
+    Results are yielded as each listing finishes. A video already yielded in
+    an earlier listing is marked 'duplicate', with the playlist it came from.
+
+    Args:
+        playlist_urls: Playlist or channel URLs
+        max_workers: Maximum concurrent listings
+        tracer: Optional fetch_tracing.Tracer recording extractor spans
+
+    Yields:
+        dict: One 'playlist' entry per URL in completion order, then a 'summary'
+            entry with the unique video IDs across all listings
+    """
+    with tracer.span('import_yt_dlp', category='startup'):
+        import yt_dlp
+
+    summary = {
+        'type': 'summary',
+        'playlists': len(playlist_urls),
+        'succeeded': 0,
+        'failed': 0,
+        'total_videos': 0,
+        'unique_videos': 0,
+        'video_ids': []
+    }
+    seen = {}
+    jobs = []
+
+    for index, url in enumerate(playlist_urls):
+        listing_url = normalize_listing_url(url)
+        if listing_url:
+            jobs.append((index, url, listing_url))
+        else:
+            summary['failed'] += 1
+            yield {
+                'type': 'playlist',
+                'index': index,
+                'source_url': url,
+                'success': False,
+                'error': 'Not a playlist or channel URL'
+            }
+
+    def worker(job):
+        index, url, listing_url = job
+        return index, url, get_playlist_videos(listing_url, tracer=tracer, ydl=get_ydl())
+
+    workers = max(1, min(max_workers, len(jobs)))
+    with per_thread_ydl(PLAYLIST_YDL_OPTS) as get_ydl, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix='playlist') as executor:
+        futures = [executor.submit(worker, job) for job in jobs]
+        for future in as_completed(futures):
+            index, url, result = future.result()
+            if result['success']:
+                summary['succeeded'] += 1
+                new_videos = 0
+                for video in result['videos']:
+                    first_seen = seen.get(video['id'])
+                    if first_seen is None:
+                        seen[video['id']] = result['playlist_id']
+                        summary['video_ids'].append(video['id'])
+                        new_videos += 1
+                    else:
+                        video['duplicate'] = True
+                        video['first_seen_in'] = first_seen
+                result['new_video_count'] = new_videos
+                summary['total_videos'] += result['video_count']
+            else:
+                summary['failed'] += 1
+            print(f"Listed {summary['succeeded'] + summary['failed']}/{len(playlist_urls)}: {url}",
+                  file=sys.stderr, flush=True)
+            yield {'type': 'playlist', 'index': index, 'source_url': url, **result}
+
+    summary['unique_videos'] = len(summary['video_ids'])
+    yield summary
+
+
 def main():
     """Main entry point for the script"""
     if len(sys.argv) < 2:
@@ -80,14 +361,15 @@ def main():
     playlist_url = sys.argv[1]
     
     # Validate URL
-    if 'list=' not in playlist_url:
+    listing_url = normalize_listing_url(playlist_url)
+    if not listing_url:
         print(json.dumps({
             'success': False,
-            'error': 'Invalid playlist URL. Must contain "list=" parameter.'
+            'error': 'Invalid playlist URL. Must contain "list=" parameter or be a channel URL.'
         }))
         sys.exit(1)
     
-    result = get_playlist_videos(playlist_url)
+    result = get_playlist_videos(listing_url)
     print(json.dumps(result, ensure_ascii=False))
 
 if __name__ == '__main__':
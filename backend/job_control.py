@@ -0,0 +1,159 @@
+"""
+Job Deadlines and Graceful Shutdown
+Keeps a fetch job bounded in time and lets it flush partial results when stopped
+
+- Deadline: a wall-clock budget for the whole job that waits and request
+  timeouts are clamped to.
+- GracefulShutdown: turns SIGTERM/SIGINT into a flag the fetch loops check,
+  and makes their sleeps return early, so completed transcripts are printed in
+  the normal output format instead of being lost.
+- call_with_timeout: bounds a single upstream call, since the transcript
+  library doesn't expose socket timeouts.
+"""
+
+import signal
+import threading
+import time
+
+
+class RequestTimeout(Exception):
+    """Raised when a single upstream request exceeds its timeout"""
+
+
+class ShutdownRequested(Exception):
+    """Raised when a request is abandoned because the job is shutting down"""
+
+
+class Deadline:
+    """Wall-clock deadline for a job (None = unbounded)"""
+
+    def __init__(self, seconds=None):
+        self.expires_at = time.monotonic() + seconds if seconds else None
+
+    def remaining(self):
+        """Seconds left, or None when there is no deadline"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def allows(self, seconds):
+        """Check whether something expected to take seconds can finish in time"""
+        remaining = self.remaining()
+        return remaining is None or seconds <= remaining
+
+    def clamp(self, seconds):
+        """Limit a wait or timeout to the time left"""
+        remaining = self.remaining()
+        if seconds is None:
+            return remaining
+        return seconds if remaining is None else min(seconds, remaining)
+
+
+class GracefulShutdown:
+    """Records SIGTERM/SIGINT instead of dying, so callers can flush and exit"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.signal_name = None
+
+    def install(self):
+        """Install handlers for SIGTERM and SIGINT (main thread only)"""
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self._handle)
+        return self
+
+    def _handle(self, signum, frame):
+        self.signal_name = signal.Signals(signum).name
+        self._event.set()
+
+    @property
+    def requested(self):
+        return self._event.is_set()
+
+    def request(self, reason='manual'):
+        """Ask for a shutdown without a signal (e.g. from tests or other code)"""
+        self.signal_name = reason
+        self._event.set()
+
+    def sleep(self, seconds):
+        """Sleep, returning early (True) if a shutdown is requested"""
+        if seconds is None or seconds <= 0:
+            return self.requested
+        return self._event.wait(seconds)
+
+
+class NoShutdown:
+    """Stand-in used when no shutdown handling is installed"""
+
+    requested = False
+    signal_name = None
+
+    def sleep(self, seconds):
+        if seconds and seconds > 0:
+            time.sleep(seconds)
+        return False
+
+
+NO_SHUTDOWN = NoShutdown()
+
+
+def call_with_timeout(fn, timeout=None, shutdown=NO_SHUTDOWN, poll_seconds=0.25):
+    """
+    Run fn() in a daemon thread and stop waiting after timeout seconds
+
+    A request stuck on a dead socket keeps its thread, but the job moves on
+    and the thread dies with the process.
+
+    Args:
+        fn: Zero-argument callable
+        timeout: Seconds to wait (None = no limit)
+        shutdown: GracefulShutdown checked while waiting
+        poll_seconds: How often to check for a shutdown
+
+    Returns:
+        Whatever fn returns
+
+    Raises:
+        RequestTimeout: fn did not finish in time
+        ShutdownRequested: a shutdown was requested while waiting
+        Exception: anything fn raised
+    """
+    outcome = {}
+    done = threading.Event()
+
+    def target():
+        try:
+            outcome['value'] = fn()
+        except BaseException as e:
+            outcome['error'] = e
+        finally:
+            done.set()
+
+    worker = threading.Thread(target=target, name='fetch-request', daemon=True)
+    worker.start()
+
+    started = time.monotonic()
+    while not done.wait(poll_seconds):
+        if shutdown.requested:
+            raise ShutdownRequested('Shutdown requested during request')
+        if timeout is not None and time.monotonic() - started >= timeout:
+            raise RequestTimeout(f"Request timed out after {timeout:.1f}s")
+
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome.get('value')
+
+
+def not_fetched_result(video_id, reason, **extra):
+    """Result entry for a video skipped because of the deadline or a shutdown"""
+    return {
+        'success': False,
+        'video_id': video_id,
+        'error': reason,
+        'error_type': 'NotFetched',
+        'skipped': True,
+        **extra
+    }
@@ -0,0 +1,354 @@
+"""
+Speculative Transcript Prefetch
+Warms the local transcript cache while the user is still picking videos
+
+After a playlist listing, the first few videos are fetched in the background
+at low priority and a small request rate. The prefetcher yields as soon as a
+real fetch job starts: foreground jobs register a marker file, and the
+prefetcher abandons its in-flight request and exits when it sees one.
+
+Only one prefetcher runs per cache directory, so the request rate holds for
+the host rather than per listing. It holds a lockfile with its PID; a
+prefetch started while it runs drops its IDs in the handoff directory and
+exits, and the running prefetcher picks them up ahead of its own.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from fetch_cache import get_cache_dir
+from job_control import NO_SHUTDOWN, Deadline
+from transcript_cache import is_transcript_cached
+
+DEFAULT_PREFETCH_LIMIT = 5
+DEFAULT_REQUESTS_PER_MINUTE = 4
+DEFAULT_MAX_SECONDS = 300
+PREFETCH_REQUEST_TIMEOUT = 30
+
+
+def get_active_jobs_dir():
+    return os.path.join(get_cache_dir(), 'active_jobs')
+
+
+def get_prefetch_lock_path():
+    return os.path.join(get_cache_dir(), 'prefetch.lock')
+
+
+def get_prefetch_handoff_dir():
+    return os.path.join(get_cache_dir(), 'prefetch_handoff')
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+@contextmanager
+def foreground_job():
+    """Mark this process as a real fetch job for the duration of the block"""
+    directory = get_active_jobs_dir()
+    marker = os.path.join(directory, str(os.getpid()))
+    try:
+        os.makedirs(directory, exist_ok=True)
+        open(marker, 'w').close()
+    except OSError:
+        marker = None
+    try:
+        yield
+    finally:
+        if marker:
+            try:
+                os.remove(marker)
+            except OSError:
+                pass
+
+
+def foreground_job_active():
+    """Check whether any live process holds a foreground job marker"""
+    try:
+        names = os.listdir(get_active_jobs_dir())
+    except OSError:
+        return False
+    for name in names:
+        if not name.isdigit():
+            continue
+        if _pid_alive(int(name)):
+            return True
+        # Stale marker from a killed job
+        try:
+            os.remove(os.path.join(get_active_jobs_dir(), name))
+        except OSError:
+            pass
+    return False
+
+
+def _read_lock_owner(path):
+    try:
+        with open(path, 'r') as f:
+            content = f.read().strip()
+    except OSError:
+        return None
+    return int(content) if content.isdigit() else None
+
+
+def acquire_prefetch_lock():
+    """
+    Take the single-instance prefetch lock
+
+    Returns:
+        bool: True if this process now holds it, False if a live prefetcher does
+    """
+    path = get_prefetch_lock_path()
+    for _ in range(2):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            owner = _read_lock_owner(path)
+            if owner is None:
+                # Owner may be between creating and writing the file
+                try:
+                    if time.time() - os.path.getmtime(path) < 60:
+                        return False
+                except OSError:
+                    continue
+            elif _pid_alive(owner):
+                return False
+            # Stale lock from a killed prefetcher
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        except OSError:
+            # Cache dir unusable; run uncoordinated rather than not at all
+            return True
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(os.getpid()))
+        return True
+    return False
+
+
+def release_prefetch_lock():
+    path = get_prefetch_lock_path()
+    if _read_lock_owner(path) == os.getpid():
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def hand_off_prefetch(video_ids, limit):
+    """Leave candidates for the running prefetcher (written atomically)"""
+    directory = get_prefetch_handoff_dir()
+    name = f"{time.time():.6f}-{os.getpid()}.json"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        temp_path = os.path.join(directory, f".{name}.tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'video_ids': list(video_ids), 'limit': limit}, f)
+        os.replace(temp_path, os.path.join(directory, name))
+    except OSError as e:
+        print(f"Could not hand off prefetch: {e}", file=sys.stderr, flush=True)
+
+
+def take_handoffs(max_age_seconds=DEFAULT_MAX_SECONDS):
+    """
+    Remove and return the handed-off candidates, oldest first
+
+    Handoffs older than max_age_seconds are dropped: the user has moved on.
+    """
+    directory = get_prefetch_handoff_dir()
+    try:
+        names = sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+    except OSError:
+        return []
+    handoffs = []
+    for name in names:
+        path = os.path.join(directory, name)
+        try:
+            fresh = time.time() - os.path.getmtime(path) <= max_age_seconds
+            with open(path, 'r', encoding='utf-8') as f:
+                handoff = json.load(f)
+            os.remove(path)
+        except (OSError, ValueError):
+            continue
+        if fresh:
+            handoffs.append((handoff.get('video_ids') or [], handoff.get('limit') or 0))
+    return handoffs
+
+
+def handoffs_pending():
+    try:
+        return any(name.endswith('.json') for name in os.listdir(get_prefetch_handoff_dir()))
+    except OSError:
+        return False
+
+
+class YieldToForeground:
+    """Shutdown flag that is also raised while a foreground job is running"""
+
+    def __init__(self, shutdown=NO_SHUTDOWN, poll_seconds=0.5):
+        self.shutdown = shutdown
+        self.poll_seconds = poll_seconds
+
+    @property
+    def requested(self):
+        return self.shutdown.requested or foreground_job_active()
+
+    @property
+    def signal_name(self):
+        return self.shutdown.signal_name or 'foreground job'
+
+    def sleep(self, seconds):
+        """Sleep in short steps, returning True as soon as we should yield"""
+        end = time.monotonic() + (seconds or 0)
+        while time.monotonic() < end:
+            if self.requested:
+                return True
+            time.sleep(min(self.poll_seconds, end - time.monotonic()))
+        return self.requested
+
+
+def run_prefetch(video_ids, limit=DEFAULT_PREFETCH_LIMIT, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+                 max_seconds=DEFAULT_MAX_SECONDS, shutdown=NO_SHUTDOWN):
+    """
+    Fetch the first uncached videos into the transcript cache
+
+    If another prefetcher is running, the candidates are handed off to it and
+    this returns straight away with stopped set accordingly.
+
+    Args:
+        video_ids: Candidate video IDs, most likely to be selected first
+        limit: Maximum videos to fetch
+        requests_per_minute: Upstream request rate budget; every HTTP request
+            counts, including fallback methods
+        max_seconds: Give up after this long
+        shutdown: GracefulShutdown for SIGTERM/SIGINT
+
+    Returns:
+        dict: Counts of fetched, already cached and failed videos, and why it stopped
+    """
+    stats = {'fetched': 0, 'already_cached': 0, 'failed': 0, 'stopped': None}
+    if not acquire_prefetch_lock():
+        hand_off_prefetch(video_ids, limit)
+        # The holder may have exited before seeing the handoff
+        if not acquire_prefetch_lock():
+            stats['stopped'] = 'Handed off to running prefetcher'
+            return stats
+        video_ids = []
+
+    # Stay out of the way of the API server and real jobs on this host
+    if hasattr(os, 'nice'):
+        try:
+            os.nice(10)
+        except OSError:
+            pass
+
+    while True:
+        try:
+            _prefetch_holding_lock(video_ids, limit, requests_per_minute, max_seconds, shutdown, stats)
+        finally:
+            release_prefetch_lock()
+        # A handoff that arrived after our last look would otherwise wait for the next run
+        if stats['stopped'] or not handoffs_pending() or not acquire_prefetch_lock():
+            return stats
+        video_ids = []
+
+
+def _prefetch_holding_lock(video_ids, limit, requests_per_minute, max_seconds, shutdown, stats):
+    from get_batch_transcripts_advanced import TranscriptFetcher
+
+    yielding = YieldToForeground(shutdown)
+    fetcher = TranscriptFetcher(
+        request_timeout=PREFETCH_REQUEST_TIMEOUT,
+        deadline=Deadline(max_seconds),
+        shutdown=yielding,
+        cache_source='prefetch'
+    )
+    spacing = 60 / max(requests_per_minute, 0.1)
+    pending = deque()
+    seen = set()
+
+    def add_candidates(candidate_ids, candidate_limit):
+        fresh = []
+        for video_id in candidate_ids:
+            if video_id in seen:
+                continue
+            seen.add(video_id)
+            if is_transcript_cached(video_id):
+                stats['already_cached'] += 1
+            else:
+                fresh.append(video_id)
+        # Later listings are what the user is looking at now, so they go first
+        pending.extendleft(reversed(fresh[:max(0, candidate_limit)]))
+
+    add_candidates(video_ids, limit)
+    for handoff in take_handoffs():
+        add_candidates(*handoff)
+
+    while pending:
+        reason = fetcher.stop_reason()
+        if reason:
+            stats['stopped'] = reason
+            break
+
+        video_id = pending.popleft()
+        requests_before = fetcher.meter.request_count()
+        result = fetcher.fetch_single_transcript(video_id, retry_count=1)
+        # A fetch can take several requests (fallback methods), so pace by requests
+        requests_made = max(1, fetcher.meter.request_count() - requests_before)
+        if result['success']:
+            stats['fetched'] += 1
+            print(f"Prefetched {video_id}", file=sys.stderr, flush=True)
+        elif result.get('skipped'):
+            stats['stopped'] = fetcher.stop_reason() or result['error']
+            break
+        else:
+            stats['failed'] += 1
+            # Throttling means real jobs are about to suffer; stop spending requests
+            if result.get('error_class') == 'throttled':
+                stats['stopped'] = 'Throttled'
+                break
+
+        for handoff in take_handoffs():
+            add_candidates(*handoff)
+        if pending and fetcher.wait(spacing * requests_made):
+            stats['stopped'] = fetcher.stop_reason()
+            break
+
+
+def spawn_prefetch(video_ids, limit=DEFAULT_PREFETCH_LIMIT, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE):
+    """
+    Start a detached prefetch process and return immediately
+
+    The child has no pipes to the caller, so whoever spawned the listing sees
+    it finish without waiting for the prefetch. If a prefetcher is already
+    running, the child hands the candidates to it and exits.
+    """
+    if not video_ids or limit <= 0:
+        return None
+    cli = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fetch_cli.py')
+    # Pass some spares so already-cached videos don't shrink the prefetch
+    candidates = list(video_ids)[:limit * 2]
+    args = [sys.executable, cli, 'prefetch', f"--limit={limit}", f"--rate={requests_per_minute}", '--', *candidates]
+    return subprocess.Popen(
+        args,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+        close_fds=True
+    )
@@ -0,0 +1,164 @@
+"""
+Cost-Aware Proxy Routing
+Chooses the egress route for each fetch attempt by tier, health and budget
+
+Free egress (free proxies, or the direct connection when none are configured)
+is used while its recent success rate holds. Premium per-GB proxies are kept
+for retries, interactive requests and a free tier that has stopped working,
+and only while today's premium bytes are under the daily budget. A free
+route judged unhealthy gets a probe attempt every probe_interval seconds; a
+successful probe clears its history, so a recovered route is used again.
+"""
+
+import os
+import time
+from collections import deque, namedtuple
+
+FREE = 'free'
+PREMIUM = 'premium'
+DIRECT = 'direct'
+
+Route = namedtuple('Route', ['name', 'url', 'tier', 'cost_per_gb'])
+
+DIRECT_ROUTE = Route(name='direct', url=None, tier=DIRECT, cost_per_gb=0.0)
+
+FREE_ROUTE_PROBE_SECONDS = 300
+
+
+def get_premium_daily_budget():
+    """Premium bytes allowed per day (EDUEXTRACT_PREMIUM_DAILY_BYTES or proxy_config)"""
+    value = os.environ.get('EDUEXTRACT_PREMIUM_DAILY_BYTES')
+    if value:
+        return int(value)
+    try:
+        from proxy_config import PREMIUM_DAILY_BYTE_BUDGET
+        return PREMIUM_DAILY_BYTE_BUDGET
+    except ImportError:
+        return 0
+
+
+def load_routes():
+    """Build routes from proxy_config, or no routes if it is missing"""
+    try:
+        from proxy_config import get_proxy_pool
+    except ImportError:
+        return []
+    return [Route(p['name'], p['url'], p['tier'], p['cost_per_gb']) for p in get_proxy_pool()]
+
+
+class ProxyRouter:
+    """Picks free or premium routes and tracks each route's recent success rate"""
+
+    def __init__(self, routes=None, ledger=None, daily_byte_budget=None,
+                 min_success_rate=0.5, window=10, min_samples=3,
+                 probe_interval=FREE_ROUTE_PROBE_SECONDS):
+        """
+        Args:
+            routes: Candidate routes (None = direct connection only)
+            ledger: DailyUsageLedger holding today's premium usage (None = no premium)
+            daily_byte_budget: Premium bytes per day (None = get_premium_daily_budget())
+            min_success_rate: Below this, a free route counts as unhealthy
+            window: Recent attempts per route used for the success rate
+            min_samples: Attempts needed before a route can be judged unhealthy
+            probe_interval: Seconds between probe attempts on an unhealthy free route
+        """
+        routes = routes or []
+        self.free_routes = [route for route in routes if route.tier != PREMIUM] or [DIRECT_ROUTE]
+        self.premium_routes = [route for route in routes if route.tier == PREMIUM]
+        self.ledger = ledger
+        self.daily_byte_budget = (
+            get_premium_daily_budget() if daily_byte_budget is None else daily_byte_budget
+        )
+        self.min_success_rate = min_success_rate
+        self.min_samples = min_samples
+        self.probe_interval = probe_interval
+        self._outcomes = {
+            route.name: deque(maxlen=window) for route in self.free_routes + self.premium_routes
+        }
+        self._free_index = 0
+        self._premium_index = 0
+        self._last_attempt = {}
+        self._probing = set()
+
+    def success_rate(self, route):
+        """Recent success rate of a route, or None before any attempt"""
+        outcomes = self._outcomes[route.name]
+        if not outcomes:
+            return None
+        return sum(outcomes) / len(outcomes)
+
+    def is_healthy(self, route):
+        outcomes = self._outcomes[route.name]
+        if len(outcomes) < self.min_samples:
+            return True
+        return self.success_rate(route) >= self.min_success_rate
+
+    def premium_bytes_today(self):
+        return self.ledger.used(PREMIUM) if self.ledger is not None else 0
+
+    def premium_available(self):
+        """Premium routes exist and today's budget isn't spent (unknown usage counts as spent)"""
+        if not self.premium_routes or self.ledger is None:
+            return False
+        used = self.premium_bytes_today()
+        return used is not None and used < self.daily_byte_budget
+
+    def _probe_candidate(self):
+        """An unhealthy free route not attempted for probe_interval seconds, if any"""
+        now = time.monotonic()
+        for route in self.free_routes:
+            last = self._last_attempt.get(route.name)
+            if not self.is_healthy(route) and (last is None or now - last >= self.probe_interval):
+                return route
+        return None
+
+    def _next(self, routes, index_attr):
+        index = getattr(self, index_attr)
+        setattr(self, index_attr, index + 1)
+        return routes[index % len(routes)]
+
+    def choose(self, retry=False, interactive=False):
+        """
+        Pick the route for the next attempt
+
+        Args:
+            retry: The attempt repeats a failed one (in place, deferred or redelivered)
+            interactive: A user is waiting on this request
+
+        Returns:
+            Route: The route to send the attempt through
+        """
+        healthy_free = [route for route in self.free_routes if self.is_healthy(route)]
+        if not healthy_free and not (retry or interactive):
+            # Otherwise an unhealthy route never gets the attempts it needs to recover
+            probe = self._probe_candidate()
+            if probe is not None:
+                self._probing.add(probe.name)
+                return probe
+        wants_premium = retry or interactive or not healthy_free
+        if wants_premium and self.premium_available():
+            return self._next(self.premium_routes, '_premium_index')
+        return self._next(healthy_free or self.free_routes, '_free_index')
+
+    def report(self, route, success):
+        """Record whether an attempt through route got an answer from YouTube"""
+        self._last_attempt[route.name] = time.monotonic()
+        if route.name in self._probing:
+            self._probing.discard(route.name)
+            if success:
+                self._outcomes[route.name].clear()
+        self._outcomes[route.name].append(bool(success))
+
+    def to_dict(self):
+        return {
+            'routes': {
+                route.name: {
+                    'tier': route.tier,
+                    'attempts': len(self._outcomes[route.name]),
+                    'success_rate': self.success_rate(route)
+                }
+                for route in self.free_routes + self.premium_routes
+            },
+            'premium_bytes_today': self.premium_bytes_today(),
+            'premium_daily_budget': self.daily_byte_budget if self.premium_routes else 0
+        }
@@ -0,0 +1,161 @@
+"""
+Transcript Queue Worker
+Drains transcript fetch tasks from the durable work queue
+
+Run several of these (on one host or many sharing the queue) to fetch one
+playlist in parallel. Each worker leases one task at a time, keeps the lease
+alive with a heartbeat thread while fetching, and spaces its own requests.
+"""
+
+import os
+import socket
+import sys
+import threading
+
+from work_queue import FAILED, PENDING, SQLiteWorkQueue
+
+
+def default_worker_id():
+    """Identify this worker as host:pid"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class LeaseHeartbeat(threading.Thread):
+    """Background thread that extends a task lease until stopped"""
+
+    def __init__(self, queue_path, task_id, worker_id, lease_seconds):
+        super().__init__(name=f"heartbeat-{task_id}", daemon=True)
+        self.queue_path = queue_path
+        self.task_id = task_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.lost = False
+        self._stop_event = threading.Event()
+
+    def run(self):
+        # SQLite connections can't be shared across threads, so use our own
+        queue = SQLiteWorkQueue(self.queue_path)
+        try:
+            while not self._stop_event.wait(self.lease_seconds / 3):
+                if not queue.heartbeat(self.task_id, self.worker_id, self.lease_seconds):
+                    self.lost = True
+                    return
+        finally:
+            queue.close()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def run_worker(queue, fetcher, worker_id=None, lease_seconds=120, exit_when_idle=True, poll_seconds=5):
+    """
+    Lease and fetch tasks until the queue is empty (or forever)
+
+    Args:
+        queue: SQLiteWorkQueue to drain
+        fetcher: TranscriptFetcher used for each video
+        worker_id: Lease owner name (default: host:pid)
+        lease_seconds: Lease length; heartbeats renew it every third of this
+        exit_when_idle: Return once no task is deliverable instead of polling
+        poll_seconds: Sleep between polls of an empty queue
+
+    Returns:
+        dict: Counts of completed, failed, requeued and released tasks handled by this worker
+    """
+    worker_id = worker_id or default_worker_id()
+    stats = {'completed': 0, 'failed': 0, 'requeued': 0, 'released': 0}
+    fetched_any = False
+
+    while True:
+        # Stop leasing once SIGTERM/SIGINT arrives; unfinished tasks are released below
+        if fetcher.shutdown.requested:
+            return stats
+
+        tasks = queue.lease(worker_id, lease_seconds=lease_seconds)
+        if not tasks:
+            if exit_when_idle:
+                return stats
+            fetcher.wait(poll_seconds)
+            continue
+
+        task = tasks[0]
+        video_id = task['video_id']
+
+        # Space requests from this worker the same way the batch fetcher does
+        if fetched_any:
+            delay = fetcher.calculate_delay()
+            print(f"Waiting {delay:.1f} seconds...", file=sys.stderr, flush=True)
+            fetcher.wait(delay)
+        fetched_any = True
+
+        print(f"[{worker_id}] Processing {video_id} (job {task['job_id']}, delivery {task['deliveries']})",
+              file=sys.stderr, flush=True)
+
+        heartbeat = LeaseHeartbeat(queue.path, task['id'], worker_id, lease_seconds)
+        heartbeat.start()
+        try:
+            # One attempt per delivery; the queue handles redelivery
+            result = fetcher.fetch_single_transcript(
+                video_id, retry_count=1, is_retry=task['deliveries'] > 1
+            )
+        except Exception as e:
+            result = {
+                'success': False,
+                'video_id': video_id,
+                'error': str(e),
+                'error_type': type(e).__name__
+            }
+        finally:
+            heartbeat.stop()
+
+        if heartbeat.lost:
+            print(f"[{worker_id}] Lost lease on {video_id}; result discarded", file=sys.stderr, flush=True)
+            continue
+
+        if result.get('skipped'):
+            # Stopped by shutdown or deadline, not by the video: don't use up a delivery
+            queue.release(task['id'], worker_id)
+            stats['released'] += 1
+            print(f"↻ Released untried: {video_id} - {result.get('error')}", file=sys.stderr, flush=True)
+        elif result['success'] or result.get('error_class') == 'permanent':
+            queue.complete(task['id'], worker_id, result)
+            if result['success']:
+                stats['completed'] += 1
+                print(f"✓ Success: {video_id}", file=sys.stderr, flush=True)
+            else:
+                stats['failed'] += 1
+                print(f"✗ Failed: {video_id} - {result.get('error', 'Unknown error')}", file=sys.stderr, flush=True)
+        else:
+            error = result.get('error', 'Unknown error')
+            state = queue.fail(task['id'], worker_id, error, retry=True)
+            if state == FAILED:
+                stats['failed'] += 1
+                print(f"✗ Failed after {task['deliveries']} deliveries: {video_id} - {error}",
+                      file=sys.stderr, flush=True)
+            elif state == PENDING:
+                stats['requeued'] += 1
+                print(f"↻ Released: {video_id} - {error}", file=sys.stderr, flush=True)
+            else:
+                print(f"[{worker_id}] Lost lease on {video_id}; result discarded", file=sys.stderr, flush=True)
+
+
+def build_job_results(queue, job_id):
+    """
+    Build batch-style output for a queued job
+
+    Returns:
+        dict: Same shape as fetch_batch() results, plus per-state task counts
+    """
+    status = queue.job_status(job_id)
+    transcripts = queue.job_results(job_id)
+    successful = sum(1 for result in transcripts.values() if result.get('success'))
+    return {
+        'job_id': job_id,
+        'total': status['total'],
+        'successful': successful,
+        'failed': len(transcripts) - successful,
+        'pending': status['pending'] + status['leased'],
+        'complete': status['pending'] + status['leased'] == 0,
+        'transcripts': transcripts
+    }
@@ -0,0 +1,166 @@
+"""
+Retry Policy for Transcript Fetching
+Classifies fetch errors and enforces a batch-wide retry budget
+
+Deterministic failures (private or invalid videos, disabled transcripts) are
+never retried. Throttling and transient network errors are retried only while
+the batch budget allows; anything left over is deferred to a later pass instead
+of sleeping in place, so total job time stays bounded.
+"""
+
+import math
+
+# Error classes
+PERMANENT = 'permanent'
+THROTTLED = 'throttled'
+TRANSIENT = 'transient'
+
+# Decisions
+RETRY = 'retry'
+DEFER = 'defer'
+FAIL = 'fail'
+
+# Matched by class name so youtube_transcript_api / requests need not be imported
+PERMANENT_ERROR_NAMES = {
+    'TranscriptsDisabled',
+    'NoTranscriptFound',
+    'NoTranscriptAvailable',
+    'VideoUnavailable',
+    'VideoUnplayable',
+    'InvalidVideoId',
+    'AgeRestricted',
+    'NotTranslatable',
+    'TranslationLanguageNotAvailable',
+    'CookiePathInvalid',
+    'CookiesInvalid',
+    'FailedToCreateConsentCookie',
+}
+
+THROTTLED_ERROR_NAMES = {
+    'TooManyRequests',
+    'RequestBlocked',
+    'IpBlocked',
+}
+
+TRANSIENT_ERROR_NAMES = {
+    'ConnectionError',
+    'ConnectTimeout',
+    'ReadTimeout',
+    'Timeout',
+    'TimeoutError',
+    'ChunkedEncodingError',
+    'ProxyError',
+    'SSLError',
+    'RemoteDisconnected',
+    'IncompleteRead',
+    'RequestTimeout',
+}
+
+THROTTLED_MESSAGE_MARKERS = ('429', 'too many requests', 'rate limit', 'blocking requests from your ip')
+PERMANENT_MESSAGE_MARKERS = ('video is unavailable', 'private video', 'invalid video id', 'no transcript')
+
+
+def classify_error(error):
+    """
+    Classify a fetch exception
+
+    Args:
+        error: Exception raised while fetching a transcript
+
+    Returns:
+        str: PERMANENT, THROTTLED or TRANSIENT
+    """
+    names = {cls.__name__ for cls in type(error).__mro__}
+    if names & PERMANENT_ERROR_NAMES:
+        return PERMANENT
+    if names & THROTTLED_ERROR_NAMES:
+        return THROTTLED
+    if names & TRANSIENT_ERROR_NAMES:
+        return TRANSIENT
+
+    message = str(error).lower()
+    if any(marker in message for marker in THROTTLED_MESSAGE_MARKERS):
+        return THROTTLED
+    if any(marker in message for marker in PERMANENT_MESSAGE_MARKERS):
+        return PERMANENT
+
+    # Unknown errors get the benefit of the doubt, within the budget
+    return TRANSIENT
+
+
+class RetryBudget:
+    """Caps extra requests and total backoff time across a whole batch"""
+
+    def __init__(self, total_videos, max_extra_request_ratio=0.25, max_backoff_seconds=300):
+        """
+        Args:
+            total_videos: Number of videos in the batch (one request each)
+            max_extra_request_ratio: Extra requests allowed, as a fraction of total_videos
+            max_backoff_seconds: Total seconds the batch may spend in retry backoff
+        """
+        self.max_extra_requests = max(1, math.ceil(total_videos * max_extra_request_ratio))
+        self.max_backoff_seconds = max_backoff_seconds
+        self.extra_requests = 0
+        self.backoff_seconds = 0.0
+
+    def can_spend(self, wait_seconds=0):
+        """Check whether one more request after wait_seconds of backoff fits the budget"""
+        return (self.extra_requests < self.max_extra_requests and
+                self.backoff_seconds + wait_seconds <= self.max_backoff_seconds)
+
+    def spend(self, wait_seconds=0):
+        """Record one extra request and its backoff"""
+        self.extra_requests += 1
+        self.backoff_seconds += wait_seconds
+
+    def to_dict(self):
+        return {
+            'extra_requests': self.extra_requests,
+            'max_extra_requests': self.max_extra_requests,
+            'backoff_seconds': round(self.backoff_seconds, 2),
+            'max_backoff_seconds': self.max_backoff_seconds,
+        }
+
+
+class RetryPolicy:
+    """Decides whether a failed attempt is retried in place, deferred or failed"""
+
+    def __init__(self, budget=None):
+        """
+        Args:
+            budget: RetryBudget shared by the batch (None = no batch-wide cap)
+        """
+        self.budget = budget
+
+    def decide(self, error_class, wait_seconds, allow_defer=True):
+        """
+        Decide what to do after a failed attempt
+
+        Args:
+            error_class: Result of classify_error()
+            wait_seconds: Backoff that an in-place retry would sleep for
+            allow_defer: False during the deferred pass, when there is no later pass
+
+        Returns:
+            str: RETRY, DEFER or FAIL
+        """
+        if error_class == PERMANENT:
+            return FAIL
+
+        # Retrying a throttled request in place just extends the throttle
+        if error_class == THROTTLED and allow_defer:
+            return DEFER
+
+        if self.can_spend(wait_seconds):
+            return RETRY
+
+        return DEFER if allow_defer else FAIL
+
+    def can_spend(self, wait_seconds=0):
+        """Check whether one more request fits the budget (always True without one)"""
+        return self.budget is None or self.budget.can_spend(wait_seconds)
+
+    def spend(self, wait_seconds):
+        """Charge an in-place retry or fallback request to the budget"""
+        if self.budget is not None:
+            self.budget.spend(wait_seconds)
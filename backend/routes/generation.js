@@ -111,20 +111,29 @@ async function parseAIResponseWithRetry(operation, maxRetries = 3) {
   }, maxRetries);
 }
 
-// Helper: Extract transcript text from YouTube URL using Python script
-async function getTranscriptText(url) {
+function transcriptCacheKey(videoId, userId) {
+  return userId ? `transcript:${userId}:${videoId}` : `transcript:${videoId}`;
+}
+
+// Helper: Extract transcript text from YouTube URL using Python script.
+// With a userId, that user's own extension-ingested captions are used when the
+// server has no transcript. Only those are cached per user; everything else is
+// cached once for all users.
+async function getTranscriptText(url, userId) {
   const videoId = new URL(url).searchParams.get("v");
   if (!videoId) throw new Error("Invalid YouTube URL");
 
-  const cacheKey = `transcript:${videoId}`;
-  const cached = transcriptCache.get(cacheKey);
+  const safeUserId = userId && /^[A-Za-z0-9_-]{1,128}$/.test(userId) ? userId : null;
+  const cached = transcriptCache.get(transcriptCacheKey(videoId)) ||
+    (safeUserId && transcriptCache.get(transcriptCacheKey(videoId, safeUserId)));
   if (cached) return cached;
 
   return new Promise((resolve, reject) => {
     // Execute the Python script, passing the videoId as an argument
     // Ensure 'python' is in your PATH, or use the full path to the python executable
-    // The Python script should print the full transcript text to stdout
-    exec(`python get_transcript.py ${videoId}`, (error, stdout, stderr) => {
+    // With --json the script prints {"text", "source"} to stdout
+    const userArg = safeUserId ? ` --user-id=${safeUserId}` : '';
+    exec(`python fetch_cli.py transcript --json${userArg} -- ${videoId}`, (error, stdout, stderr) => {
       if (error) {
         console.error(`exec error: ${error}`);
         return reject(new Error(`Failed to get transcript from Python script: ${stderr}`));
@@ -132,11 +141,18 @@ async function getTranscriptText(url) {
       if (stderr) {
         console.warn(`Python script stderr: ${stderr}`);
       }
-      const fullText = stdout.trim();
+      let result;
+      try {
+        result = JSON.parse(stdout);
+      } catch (parseError) {
+        return reject(new Error("Python script returned invalid output."));
+      }
+      const fullText = (result.text || '').trim();
       if (!fullText) {
         return reject(new Error("Python script returned empty transcript."));
       }
-      transcriptCache.set(cacheKey, fullText);
+      const ownIngest = result.source === 'client' && safeUserId;
+      transcriptCache.set(transcriptCacheKey(videoId, ownIngest ? safeUserId : null), fullText);
       resolve(fullText);
     });
   });
@@ -151,8 +167,14 @@ async function getTranscriptText(url) {
 async function getPlaylistInfo(playlistUrl) {
   return new Promise((resolve, reject) => {
     const { spawn } = require('child_process');
+    // Opt-in: warm the transcript cache for the first N videos while the user picks
+    const prefetchArgs = process.env.PLAYLIST_PREFETCH_COUNT
+      ? [`--prefetch=${parseInt(process.env.PLAYLIST_PREFETCH_COUNT, 10) || 0}`]
+      : [];
     const pythonProcess = spawn('python', [
-      path.join(__dirname, '../get_playlist.py'),
+      path.join(__dirname, '../fetch_cli.py'),
+      'playlist',
+      ...prefetchArgs,
       playlistUrl
     ]);
 
@@ -199,8 +221,10 @@ async function getBatchTranscripts(videoIds, delaySeconds = 5) {
     
     // Prepare arguments: video IDs + delay parameter
     const args = [
-      path.join(__dirname, '../get_batch_transcripts.py'),
+      path.join(__dirname, '../fetch_cli.py'),
+      'batch',
       `--delay=${delaySeconds}`,
+      '--',
       ...videoIds
     ];
     
@@ -258,7 +282,7 @@ router.post("/generate-blog", verifyToken, async (req, res) => {
     // Accept either URL or direct text content
     const transcriptText = req.body.textContent 
       ? req.body.textContent 
-      : await getTranscriptText(req.body.url);
+      : await getTranscriptText(req.body.url, req.user.uid);
     const userId = req.user.uid; // Get userId from verified token
 
     // Fetch user preferences
@@ -353,7 +377,7 @@ router.post("/generate-flashcards", verifyToken, async (req, res) => {
     // Accept either URL or direct text content
     const transcriptText = req.body.textContent 
       ? req.body.textContent 
-      : await getTranscriptText(req.body.url);
+      : await getTranscriptText(req.body.url, req.user.uid);
     const userId = req.user.uid;
 
     // Fetch user preferences
@@ -442,7 +466,7 @@ router.post("/generate-slides", verifyToken, async (req, res) => {
     } else {
       const videoId = new URL(url).searchParams.get("v");
       if (!videoId) return res.status(400).json({ error: "Invalid YouTube URL" });
-      transcriptText = await getTranscriptText(url);
+      transcriptText = await getTranscriptText(url, req.user.uid);
     }
 
     // Fetch user preferences
@@ -679,7 +703,7 @@ router.post("/generate-quiz", verifyToken, async (req, res) => {
     // Accept either URL or direct text content
     const transcriptText = req.body.textContent 
       ? req.body.textContent 
-      : await getTranscriptText(req.body.url);
+      : await getTranscriptText(req.body.url, req.user.uid);
     const userId = req.user.uid;
 
     // Fetch user preferences
@@ -782,7 +806,7 @@ router.post("/generate-summary", verifyToken, async (req, res) => {
     } else {
       const videoId = new URL(url).searchParams.get("v");
       if (!videoId) return res.status(400).json({ error: "Invalid YouTube URL" });
-      transcriptText = await getTranscriptText(url);
+      transcriptText = await getTranscriptText(url, req.user.uid);
     }
     
     console.log(`Processing transcript for summary (${transcriptText.length} characters)`);
@@ -2075,7 +2099,7 @@ router.post("/api/transcript", verifyToken, async (req, res) => {
       return res.status(400).json({ error: "Invalid YouTube URL" });
     }
 
-    const transcriptText = await getTranscriptText(url);
+    const transcriptText = await getTranscriptText(url, req.user.uid);
     
     console.log(`Transcript fetched successfully (${transcriptText.length} characters)`);
 
@@ -2523,4 +2547,63 @@ router.post("/transcribe-audio", verifyToken, audioUpload.single('audio'), async
   }
 });
 
+// Ingest a caption track captured by the browser extension on the watch page.
+// The payload is sent as-is (json3 or timedtext) with a text content type, so the
+// app-wide JSON body limit doesn't apply; the Python side validates it and caches it
+// for this user only, behind any server-fetched transcript.
+router.post(
+  "/api/transcripts/:videoId/ingest",
+  verifyToken,
+  express.text({ type: () => true, limit: '5mb' }),
+  async (req, res) => {
+    const { videoId } = req.params;
+    const format = req.query.format;
+    const payload = typeof req.body === 'string' ? req.body : JSON.stringify(req.body || '');
+
+    if (!/^[A-Za-z0-9_-]{11}$/.test(videoId)) {
+      return res.status(400).json({ success: false, error: "Invalid video ID" });
+    }
+    if (format && !['json3', 'timedtext'].includes(format)) {
+      return res.status(400).json({ success: false, error: "format must be json3 or timedtext" });
+    }
+
+    const { spawn } = require('child_process');
+    const args = [
+      path.join(__dirname, '../fetch_cli.py'),
+      'ingest',
+      `--video-id=${videoId}`,
+      `--user-id=${req.user.uid}`
+    ];
+    if (format) args.push(`--format=${format}`);
+    const pythonProcess = spawn('python', args);
+
+    let dataString = '';
+    let errorString = '';
+    pythonProcess.stdout.on('data', (data) => {
+      dataString += data.toString();
+    });
+    pythonProcess.stderr.on('data', (data) => {
+      errorString += data.toString();
+    });
+
+    pythonProcess.on('close', (code) => {
+      let result;
+      try {
+        result = JSON.parse(dataString);
+      } catch (error) {
+        console.error('Transcript ingest failed:', errorString || dataString);
+        return res.status(500).json({ success: false, error: "Failed to ingest transcript" });
+      }
+      if (code !== 0 || !result.success) {
+        return res.status(400).json(result);
+      }
+      // Drop this user's stale in-memory copy so their next request reads the ingested track
+      transcriptCache.del(transcriptCacheKey(videoId, req.user.uid));
+      res.json(result);
+    });
+
+    pythonProcess.stdin.end(payload);
+  }
+);
+
 module.exports = router;
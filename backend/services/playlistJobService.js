@@ -81,6 +81,9 @@ class PlaylistJobManager extends EventEmitter {
         delay: options.delay || this.getOptimalDelay(videoIds.length),
         chunkSize: options.chunkSize || this.getOptimalChunkSize(videoIds.length),
         useAdvanced: videoIds.length > 10, // Use advanced script for 10+ videos
+        order: options.order || 'given', // given, shortest, longest
+        deadline: options.deadline || null, // seconds before the fetcher stops and flushes partial results
+        requestTimeout: options.requestTimeout || 60, // seconds before a single video fetch is abandoned
       }
     };
 
@@ -125,21 +128,33 @@ class PlaylistJobManager extends EventEmitter {
     this.emit('jobStarted', { jobId, userId: job.userId });
 
     try {
-      // Use advanced script for better handling
-      const scriptPath = job.options.useAdvanced 
-        ? path.join(__dirname, '../get_batch_transcripts_advanced.py')
-        : path.join(__dirname, '../get_batch_transcripts.py');
+      // Use advanced fetcher for better handling
+      const scriptPath = path.join(__dirname, '../fetch_cli.py');
+
+      const timeArgs = [
+        `--request-timeout=${job.options.requestTimeout}`,
+        ...(job.options.deadline ? [`--deadline=${job.options.deadline}`] : [])
+      ];
 
       const args = job.options.useAdvanced
         ? [
             scriptPath,
+            'batch',
+            '--advanced',
             `--delay=${job.options.delay}`,
             `--chunk-size=${job.options.chunkSize}`,
+            `--order=${job.options.order}`,
+            ...timeArgs,
+            '--',
             ...job.videoIds
           ]
         : [
             scriptPath,
+            'batch',
             `--delay=${job.options.delay}`,
+            `--order=${job.options.order}`,
+            ...timeArgs,
+            '--',
             ...job.videoIds
           ];
 
@@ -183,6 +198,19 @@ class PlaylistJobManager extends EventEmitter {
       pythonProcess.on('close', (code) => {
         this.activeJobs.delete(jobId);
 
+        // A cancelled fetcher flushes the transcripts it finished before exiting
+        if (job.status === 'cancelled') {
+          try {
+            const result = JSON.parse(dataString);
+            job.transcripts = result.transcripts || {};
+            job.successfulVideos = result.successful || 0;
+            job.failedVideos = result.failed || 0;
+          } catch (error) {
+            // Killed before it could flush; nothing to keep
+          }
+          return;
+        }
+
         if (code !== 0) {
           job.status = 'failed';
           job.errors.push(`Process exited with code ${code}: ${errorString}`);
@@ -244,8 +272,9 @@ class PlaylistJobManager extends EventEmitter {
 
     const process = this.activeJobs.get(jobId);
     if (process) {
-      process.kill();
-      this.activeJobs.delete(jobId);
+      // SIGTERM lets the fetcher print completed transcripts before exiting;
+      // the close handler keeps them on the cancelled job
+      process.kill('SIGTERM');
     }
 
     job.status = 'cancelled';
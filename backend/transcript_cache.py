@@ -0,0 +1,121 @@
+"""
+Local Transcript Cache
+Successful transcript results keyed by video id, shared by all fetch paths
+
+Batch fetchers check it before going to the network, so transcripts that were
+prefetched or fetched by an earlier job cost no request.
+
+Transcripts ingested from a user's browser live in a separate cache keyed by
+user and video. Only that user's own lookups read them, and only when no
+server-fetched transcript exists, so a client payload can never replace or
+shadow what everyone else is served.
+"""
+
+import re
+import time
+
+from fetch_cache import JsonFileCache
+
+# Transcripts almost never change once published; refresh after a week
+TRANSCRIPT_CACHE_TTL = 7 * 24 * 3600
+
+USER_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,128}$')
+VIDEO_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{11}$')
+
+_cache = None
+_client_cache = None
+
+
+def get_transcript_cache():
+    """Get the shared transcript cache"""
+    global _cache
+    if _cache is None:
+        _cache = JsonFileCache('transcripts', ttl_seconds=TRANSCRIPT_CACHE_TTL)
+    return _cache
+
+
+def get_client_transcript_cache():
+    """Get the cache of client-ingested transcripts, keyed by user and video"""
+    global _client_cache
+    if _client_cache is None:
+        _client_cache = JsonFileCache('client_transcripts', ttl_seconds=TRANSCRIPT_CACHE_TTL)
+    return _client_cache
+
+
+def _client_key(user_id, video_id):
+    if not user_id or not USER_ID_PATTERN.match(user_id):
+        raise ValueError(f"Invalid user ID: {user_id!r}")
+    if not video_id or not VIDEO_ID_PATTERN.match(video_id):
+        raise ValueError(f"Invalid video ID: {video_id!r}")
+    # '.' survives JsonFileCache key sanitizing and can't occur in either ID
+    return f"{user_id}.{video_id}"
+
+
+def get_cached_transcript(video_id, user_id=None):
+    """
+    Look up a cached transcript
+
+    Args:
+        video_id: YouTube video ID
+        user_id: Requesting user; falls back to their own ingested transcript
+            when no server-fetched one is cached (None = server cache only)
+
+    Returns:
+        dict: A successful fetch result marked 'cached', or None
+    """
+    entry = get_transcript_cache().get(video_id)
+    if (not entry or not entry.get('text')) and user_id:
+        try:
+            key = _client_key(user_id, video_id)
+        except ValueError:
+            return None
+        entry = get_client_transcript_cache().get(key)
+    if not entry or not entry.get('text'):
+        return None
+    return {
+        'success': True,
+        'video_id': video_id,
+        'text': entry['text'],
+        'segment_count': entry.get('segment_count', 0),
+        'cached': True,
+        'source': entry.get('source', 'server')
+    }
+
+
+def store_transcript(video_id, result, source='server'):
+    """
+    Cache a successful fetch result
+
+    Args:
+        video_id: YouTube video ID
+        result: Fetch result dict with 'text' and 'segment_count'
+        source: Where the transcript came from ('server', 'prefetch', ...)
+    """
+    if not result.get('success') or not result.get('text') or result.get('cached'):
+        return
+    get_transcript_cache().set(video_id, {
+        'text': result['text'],
+        'segment_count': result.get('segment_count', 0),
+        'source': source,
+        'stored_at': time.time()
+    })
+
+
+def store_client_transcript(user_id, video_id, result):
+    """
+    Cache a transcript ingested from user_id's browser, visible to that user only
+
+    Raises:
+        ValueError: user_id is empty or malformed
+    """
+    key = _client_key(user_id, video_id)
+    get_client_transcript_cache().set(key, {
+        'text': result['text'],
+        'segment_count': result.get('segment_count', 0),
+        'source': 'client',
+        'stored_at': time.time()
+    })
+
+
+def is_transcript_cached(video_id):
+    return get_transcript_cache().has(video_id)
@@ -0,0 +1,137 @@
+"""
+Client Transcript Ingest
+Accepts caption payloads captured in the browser and caches them as transcripts
+
+The chrome extension runs on the watch page, where the caption track can be
+fetched without going through our rate-limited egress. It posts the raw
+json3 or timedtext payload here; the payload is validated, parsed with the
+same parsers as local caption files and stored for the submitting user only.
+That user's transcript requests use it when no server-fetched transcript is
+cached; nobody else's requests ever see it (see transcript_cache).
+"""
+
+import io
+import math
+import re
+import xml.etree.ElementTree as ET
+
+from caption_parsers import CaptionParseError, iter_json3_segments, iter_timedtext_segments
+from transcript_cache import USER_ID_PATTERN, VIDEO_ID_PATTERN, store_client_transcript
+
+INGEST_FORMATS = ('json3', 'timedtext')
+
+# A multi-hour json3 track is a few MB; anything far beyond that isn't captions
+MAX_PAYLOAD_BYTES = 5 * 1024 * 1024
+MAX_SEGMENTS = 50000
+MAX_START_SECONDS = 24 * 3600
+
+# Entity declarations are never part of timedtext and can blow up expat
+DOCTYPE_PATTERN = re.compile(r'<!(?:DOCTYPE|ENTITY)', re.IGNORECASE)
+
+
+class TranscriptIngestError(Exception):
+    """Raised when a client-supplied caption payload is rejected"""
+
+
+def detect_format(payload):
+    """Guess the payload format from its first character"""
+    head = payload.lstrip('\ufeff \t\r\n')[:1]
+    if head == '{':
+        return 'json3'
+    if head == '<':
+        return 'timedtext'
+    raise TranscriptIngestError('Unrecognized caption payload (expected json3 or timedtext)')
+
+
+def _validate_segment(segment):
+    start = segment['start']
+    duration = segment['duration']
+    for value in (start, duration):
+        if not isinstance(value, (int, float)) or not math.isfinite(value) or value < 0:
+            raise TranscriptIngestError(f"Invalid segment timing: {value!r}")
+    if start > MAX_START_SECONDS:
+        raise TranscriptIngestError(f"Segment starts at {start:.0f}s, beyond any video length")
+
+
+def parse_caption_payload(payload, fmt=None):
+    """
+    Validate and parse a client-captured caption payload
+
+    Args:
+        payload: Raw payload as str or UTF-8 bytes
+        fmt: 'json3' or 'timedtext' (None = detect)
+
+    Returns:
+        list: Segments shaped {'text', 'start', 'duration'}
+
+    Raises:
+        TranscriptIngestError: The payload is too large, malformed or empty
+    """
+    if isinstance(payload, bytes):
+        if len(payload) > MAX_PAYLOAD_BYTES:
+            raise TranscriptIngestError(f"Payload exceeds {MAX_PAYLOAD_BYTES} bytes")
+        try:
+            payload = payload.decode('utf-8')
+        except UnicodeDecodeError:
+            raise TranscriptIngestError('Payload is not valid UTF-8')
+    elif len(payload.encode('utf-8')) > MAX_PAYLOAD_BYTES:
+        raise TranscriptIngestError(f"Payload exceeds {MAX_PAYLOAD_BYTES} bytes")
+
+    fmt = fmt or detect_format(payload)
+    if fmt not in INGEST_FORMATS:
+        raise TranscriptIngestError(f"Unsupported caption format: {fmt}")
+
+    if fmt == 'json3':
+        segment_iter = iter_json3_segments(io.StringIO(payload.lstrip('\ufeff')))
+    else:
+        if DOCTYPE_PATTERN.search(payload):
+            raise TranscriptIngestError('DOCTYPE and entity declarations are not allowed')
+        segment_iter = iter_timedtext_segments(io.BytesIO(payload.encode('utf-8')))
+
+    segments = []
+    try:
+        for segment in segment_iter:
+            _validate_segment(segment)
+            segments.append(segment)
+            if len(segments) > MAX_SEGMENTS:
+                raise TranscriptIngestError(f"More than {MAX_SEGMENTS} segments")
+    except (CaptionParseError, ET.ParseError, ValueError, TypeError, AttributeError) as e:
+        # Non-dict events or non-numeric times surface as TypeError/AttributeError
+        raise TranscriptIngestError(f"Malformed {fmt} payload: {e}")
+
+    if not segments:
+        raise TranscriptIngestError('Caption payload contains no text')
+    return segments
+
+
+def ingest_transcript(video_id, payload, user_id, fmt=None):
+    """
+    Parse a client-captured caption payload and store it for the submitting user
+
+    Args:
+        video_id: YouTube video ID the captions belong to
+        payload: Raw json3 or timedtext payload
+        user_id: Authenticated user who submitted the payload
+        fmt: 'json3' or 'timedtext' (None = detect)
+
+    Returns:
+        dict: The stored transcript result, shaped like a server fetch result
+
+    Raises:
+        TranscriptIngestError: Invalid video ID, user ID or payload
+    """
+    if not video_id or not VIDEO_ID_PATTERN.match(video_id):
+        raise TranscriptIngestError(f"Invalid video ID: {video_id!r}")
+    if not user_id or not USER_ID_PATTERN.match(user_id):
+        raise TranscriptIngestError(f"Invalid user ID: {user_id!r}")
+
+    segments = parse_caption_payload(payload, fmt)
+    result = {
+        'success': True,
+        'video_id': video_id,
+        'text': ' '.join(segment['text'] for segment in segments),
+        'segment_count': len(segments),
+        'source': 'client'
+    }
+    store_client_transcript(user_id, video_id, result)
+    return result
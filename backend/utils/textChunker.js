@@ -1,7 +1,52 @@
 /**
  * Text Chunker Utility
  * Splits large texts into smaller chunks for embedding and retrieval
+ *
+ * Chunking matches backend/chunk_manifest.py exactly, so the chunk hashes in
+ * its manifests name the chunks embedded here: the text is normalized first
+ * (NFKC, zero-width characters dropped, whitespace collapsed), indexes count
+ * code points, and a chunk ends at a sentence end near the target size or,
+ * in unpunctuated text such as auto captions, before the nearby word with the
+ * lowest FNV-1a hash. Change both files together.
  */
+const crypto = require('crypto');
+
+const ZERO_WIDTH_PATTERN = /[\u200b\u200c\u200d\u2060\ufeff]/g;
+// Python's str.split() whitespace: \s plus the separators JavaScript leaves out
+const WHITESPACE_PATTERN = /[\s\x1c-\x1f\x85]+/;
+
+/**
+ * Normalize text before chunking and hashing (same as normalize_text in Python)
+ * @param {string} text - Text to normalize
+ * @returns {string} Normalized text
+ */
+function normalizeText(text) {
+  return text
+    .normalize('NFKC')
+    .replace(ZERO_WIDTH_PATTERN, '')
+    .split(WHITESPACE_PATTERN)
+    .filter(Boolean)
+    .join(' ');
+}
+
+/**
+ * SHA-256 of normalized text, as stored in chunk manifests
+ * @param {string} text - Text to hash
+ * @returns {string} Hex digest
+ */
+function contentHash(text) {
+  return crypto.createHash('sha256').update(normalizeText(text), 'utf8').digest('hex');
+}
+
+// 32-bit FNV-1a over the word's UTF-8 bytes
+function wordHash(word) {
+  let value = 0x811c9dc5;
+  for (const byte of Buffer.from(word, 'utf8')) {
+    value = Math.imul(value ^ byte, 0x01000193) >>> 0;
+  }
+  return value;
+}
+
 class TextChunker {
   constructor(options = {}) {
     this.chunkSize = options.chunkSize || 800; // Reduced from 1000 to prevent too many chunks
@@ -11,99 +56,128 @@ class TextChunker {
   }
 
   /**
-   * Split text into chunks
+   * Split normalized text into chunks
    * @param {string} text - Text to chunk
    * @param {Object} metadata - Optional metadata to attach to each chunk
-   * @returns {Array<Object>} Array of chunk objects with text and metadata
+   * @returns {Array<Object>} Array of chunk objects with text, contentHash and metadata
    */
   chunkText(text, metadata = {}) {
     if (!text || typeof text !== 'string') {
       return [];
     }
 
-    const chunks = [];
-    const textLength = text.length;
+    // Code points, so indexes match the Python side for any character
+    const chars = Array.from(normalizeText(text));
+    const textLength = chars.length;
+    const makeChunk = (chunkText, chunkIndex, startIndex, endIndex) => ({
+      text: chunkText,
+      contentHash: contentHash(chunkText),
+      chunkIndex,
+      startIndex,
+      endIndex,
+      ...metadata
+    });
 
     // If text is smaller than chunk size, return as single chunk
     if (textLength <= this.chunkSize) {
-      return [{
-        text: text.trim(),
-        chunkIndex: 0,
-        startIndex: 0,
-        endIndex: textLength,
-        ...metadata
-      }];
+      return textLength ? [makeChunk(chars.join(''), 0, 0, textLength)] : [];
     }
 
+    const chunks = [];
     let startIndex = 0;
-    let chunkIndex = 0;
 
     while (startIndex < textLength && chunks.length < this.maxChunks) {
       let endIndex = Math.min(startIndex + this.chunkSize, textLength);
 
-      // Try to break at sentence boundary (period, exclamation, question mark)
+      // Try to break at sentence boundary, else at a content-chosen word
       if (endIndex < textLength) {
-        const sentenceEnd = this.findSentenceBoundary(text, endIndex);
-        if (sentenceEnd > startIndex + this.minChunkSize) {
-          endIndex = sentenceEnd;
+        let boundary = this.findSentenceBoundary(chars, endIndex);
+        if (boundary === endIndex) {
+          boundary = this.findContentBoundary(chars, endIndex);
+        }
+        if (boundary > startIndex + this.minChunkSize) {
+          endIndex = boundary;
         }
       }
 
       // Extract chunk text
-      const chunkText = text.substring(startIndex, endIndex).trim();
+      const chunkText = chars.slice(startIndex, endIndex).join('').trim();
 
       // Only add chunk if it meets minimum size
-      if (chunkText.length >= this.minChunkSize) {
-        chunks.push({
-          text: chunkText,
-          chunkIndex: chunkIndex++,
-          startIndex,
-          endIndex,
-          ...metadata
-        });
+      if (Array.from(chunkText).length >= this.minChunkSize) {
+        chunks.push(makeChunk(chunkText, chunks.length, startIndex, endIndex));
       }
 
-      // Move start index with overlap
-      startIndex = endIndex - this.chunkOverlap;
-      if (startIndex < 0) startIndex = 0;
-      
-      // If we've reached max chunks, break
-      if (chunks.length >= this.maxChunks) {
+      // Stop at the end instead of re-emitting the overlapping tail
+      if (endIndex >= textLength) {
         break;
       }
+
+      // Move start index with overlap
+      startIndex = Math.max(0, endIndex - this.chunkOverlap);
     }
 
     return chunks;
   }
 
   /**
-   * Find sentence boundary near the given index
-   * @param {string} text - Text to search
+   * Find the last sentence end at or before the given index
+   * @param {Array<string>} chars - Normalized text as code points
    * @param {number} index - Index to search around
-   * @returns {number} Index of sentence boundary
+   * @returns {number} Index just after the sentence end, or index if none
    */
-  findSentenceBoundary(text, index) {
+  findSentenceBoundary(chars, index) {
     const searchRange = 100; // Search within 100 characters
     const start = Math.max(0, index - searchRange);
-    const end = Math.min(text.length, index + searchRange);
+    const end = Math.min(chars.length, index + searchRange);
 
-    // Look for sentence endings
-    const sentenceEndings = /[.!?]\s+/g;
+    // Normalized text has single spaces, so a sentence end is [.!?] then ' '
     let lastMatch = index;
-    let match;
-
-    while ((match = sentenceEndings.exec(text.substring(start, end))) !== null) {
-      const matchIndex = start + match.index + match[0].length;
-      if (matchIndex <= index) {
-        lastMatch = matchIndex;
-      } else {
-        break;
+    for (let i = start; i + 1 < end; i++) {
+      if ('.!?'.includes(chars[i]) && chars[i + 1] === ' ') {
+        if (i + 2 > index) {
+          break;
+        }
+        lastMatch = i + 2;
       }
     }
 
     return lastMatch;
   }
 
+  /**
+   * Pick a boundary before index from the words themselves: the start of the
+   * word with the lowest hash among words starting in the search range.
+   * A small shift of the text usually leaves that word in range.
+   * @param {Array<string>} chars - Normalized text as code points
+   * @param {number} index - Target end of the chunk
+   * @returns {number} Start of the chosen word, or index if none
+   */
+  findContentBoundary(chars, index) {
+    const searchRange = 100;
+    const start = Math.max(0, index - searchRange);
+    let bestPosition = index;
+    let bestHash = null;
+
+    for (let i = start; i <= index && i < chars.length; i++) {
+      const wordStart = chars[i] !== ' ' && (i === 0 || chars[i - 1] === ' ');
+      if (!wordStart) {
+        continue;
+      }
+      let wordEnd = i;
+      while (wordEnd < chars.length && chars[wordEnd] !== ' ') {
+        wordEnd++;
+      }
+      const hash = wordHash(chars.slice(i, wordEnd).join(''));
+      if (bestHash === null || hash < bestHash) {
+        bestPosition = i;
+        bestHash = hash;
+      }
+    }
+
+    return bestPosition;
+  }
+
   /**
    * Chunk content based on type
    * @param {*} content - Content to chunk (string, array, object)
@@ -218,4 +292,6 @@ class TextChunker {
 }
 
 module.exports = TextChunker;
+module.exports.normalizeText = normalizeText;
+module.exports.contentHash = contentHash;
 
@@ -0,0 +1,91 @@
+"""
+Transcript Fetch Scheduling
+Decides the order in which batch fetches process videos
+
+Fetching short videos first makes partial results useful sooner: in a mixed
+playlist a ten-minute clip no longer waits behind a three-hour lecture.
+"""
+
+import json
+
+from fetch_cache import JsonFileCache
+from fetch_tracing import NULL_TRACER
+from get_playlist import METADATA_CACHE_TTL, enrich_playlist_videos
+from job_control import NO_SHUTDOWN
+
+ORDERS = ('given', 'shortest', 'longest')
+
+
+def load_durations(path):
+    """
+    Load video durations from a JSON file
+
+    Accepts either get_playlist.py output ({"videos": [{"id", "duration"}, ...]})
+    or a plain {"video_id": seconds} mapping.
+
+    Args:
+        path: Path to the JSON file
+
+    Returns:
+        dict: video_id -> duration in seconds
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    if isinstance(data, dict) and isinstance(data.get('videos'), list):
+        return {video['id']: video.get('duration') or 0 for video in data['videos'] if video.get('id')}
+    if isinstance(data, dict):
+        return {video_id: duration or 0 for video_id, duration in data.items()}
+    raise ValueError('Durations file must be a playlist listing or a {video_id: seconds} object')
+
+
+def lookup_durations(video_ids, enrich=False, max_workers=4, tracer=None,
+                     shutdown=NO_SHUTDOWN, deadline=None):
+    """
+    Get durations from the local metadata cache, optionally fetching missing ones
+
+    Args:
+        video_ids: List of YouTube video IDs
+        enrich: Fetch metadata for videos missing from the cache
+        max_workers: Maximum concurrent metadata requests when enriching
+        tracer: Optional fetch_tracing.Tracer passed through to enrichment
+        shutdown: GracefulShutdown that stops enrichment early
+        deadline: Optional Deadline that stops enrichment early
+
+    Returns:
+        dict: video_id -> duration in seconds (0 when unknown)
+    """
+    cache = JsonFileCache('video_metadata', ttl_seconds=METADATA_CACHE_TTL)
+    videos = []
+    for video_id in video_ids:
+        cached = cache.get(video_id)
+        videos.append({'id': video_id, 'duration': (cached or {}).get('duration') or 0})
+
+    if enrich:
+        enrich_playlist_videos(videos, max_workers=max_workers, tracer=tracer or NULL_TRACER,
+                               shutdown=shutdown, deadline=deadline)
+
+    return {video['id']: video['duration'] for video in videos}
+
+
+def order_video_ids(video_ids, order='given', durations=None):
+    """
+    Order video IDs for fetching
+
+    Args:
+        video_ids: List of YouTube video IDs in user/playlist order
+        order: 'given' keeps the input order, 'shortest' or 'longest' sorts by duration
+        durations: dict of video_id -> seconds; unknown durations sort last
+
+    Returns:
+        list: Video IDs in fetch order (ties keep their input order)
+    """
+    if order not in ORDERS:
+        raise ValueError(f"Unknown order '{order}'. Expected one of: {', '.join(ORDERS)}")
+    if order == 'given' or not durations:
+        return list(video_ids)
+
+    known = [video_id for video_id in video_ids if durations.get(video_id)]
+    unknown = [video_id for video_id in video_ids if not durations.get(video_id)]
+    known.sort(key=lambda video_id: durations[video_id], reverse=(order == 'longest'))
+    return known + unknown
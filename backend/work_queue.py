@@ -0,0 +1,239 @@
+"""
+Durable Transcript Work Queue
+Lease-based task queue that lets several worker processes drain one job
+
+Each task is one video of one job. Workers lease tasks for a limited time,
+extend the lease with heartbeats while fetching, and complete or fail them.
+Tasks whose lease expires (crashed or stuck worker) are delivered again, up to
+max_deliveries times. Jobs survive API restarts because the queue lives on disk.
+
+WorkQueue is the interface; SQLiteWorkQueue is the local implementation. A
+shared store (Postgres, Redis, ...) can be added later behind the same methods.
+"""
+
+import json
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+
+from fetch_cache import get_cache_dir
+
+# Task states
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def get_default_queue_path():
+    """Get the queue database path (EDUEXTRACT_QUEUE_PATH or inside the cache dir)"""
+    return os.environ.get('EDUEXTRACT_QUEUE_PATH', os.path.join(get_cache_dir(), 'work_queue.sqlite3'))
+
+
+class WorkQueue(ABC):
+    """Interface for transcript fetch work queues"""
+
+    @abstractmethod
+    def enqueue(self, job_id, video_ids):
+        """Add one task per video to a job; returns the number of new tasks"""
+
+    @abstractmethod
+    def lease(self, worker_id, lease_seconds=120, limit=1):
+        """Lease up to limit deliverable tasks; returns a list of task dicts"""
+
+    @abstractmethod
+    def heartbeat(self, task_id, worker_id, lease_seconds=120):
+        """Extend a lease; returns False if the worker no longer holds it"""
+
+    @abstractmethod
+    def complete(self, task_id, worker_id, result):
+        """Store a task's result; returns False if the worker no longer holds it"""
+
+    @abstractmethod
+    def fail(self, task_id, worker_id, error, retry=True):
+        """
+        Release a task after an error, for redelivery if retry and deliveries remain
+
+        Returns:
+            str: The task's new state (PENDING or FAILED), or None if the
+                worker no longer holds it
+        """
+
+    @abstractmethod
+    def release(self, task_id, worker_id):
+        """Hand a task back untried (e.g. worker shutdown) without using up a delivery"""
+
+    @abstractmethod
+    def job_status(self, job_id):
+        """Count tasks per state for a job"""
+
+    @abstractmethod
+    def job_results(self, job_id):
+        """Get the stored result for each finished task of a job, keyed by video id"""
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """WorkQueue stored in a local SQLite database, safe for multiple processes"""
+
+    def __init__(self, path=None, max_deliveries=3):
+        """
+        Args:
+            path: Database file (default: get_default_queue_path())
+            max_deliveries: Times a task may be leased before it is failed for good
+        """
+        self.path = path or get_default_queue_path()
+        self.max_deliveries = max_deliveries
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                video_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                deliveries INTEGER NOT NULL DEFAULT 0,
+                lease_owner TEXT,
+                lease_expires REAL,
+                result TEXT,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                UNIQUE (job_id, video_id)
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status, lease_expires)')
+
+    def close(self):
+        self._conn.close()
+
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front so two workers can
+        # never lease the same task
+        self._conn.execute('BEGIN IMMEDIATE')
+
+    def enqueue(self, job_id, video_ids):
+        now = time.time()
+        self._transaction()
+        try:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                'INSERT OR IGNORE INTO tasks (job_id, video_id, position, updated_at) VALUES (?, ?, ?, ?)',
+                [(job_id, video_id, position, now) for position, video_id in enumerate(video_ids)]
+            )
+            added = self._conn.total_changes - before
+            self._conn.execute('COMMIT')
+            return added
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+
+    def lease(self, worker_id, lease_seconds=120, limit=1):
+        now = time.time()
+        self._transaction()
+        try:
+            # Expired leases that have used up their deliveries are failed, not redelivered
+            self._conn.execute(
+                'UPDATE tasks SET status = ?, error = COALESCE(error, ?), lease_owner = NULL, updated_at = ? '
+                'WHERE status = ? AND lease_expires < ? AND deliveries >= ?',
+                (FAILED, 'Lease expired too many times', now, LEASED, now, self.max_deliveries)
+            )
+            rows = self._conn.execute(
+                'SELECT * FROM tasks WHERE (status = ? OR (status = ? AND lease_expires < ?)) '
+                'ORDER BY deliveries, job_id, position LIMIT ?',
+                (PENDING, LEASED, now, limit)
+            ).fetchall()
+            tasks = []
+            for row in rows:
+                self._conn.execute(
+                    'UPDATE tasks SET status = ?, lease_owner = ?, lease_expires = ?, '
+                    'deliveries = deliveries + 1, updated_at = ? WHERE id = ?',
+                    (LEASED, worker_id, now + lease_seconds, now, row['id'])
+                )
+                task = dict(row)
+                task['deliveries'] += 1
+                tasks.append(task)
+            self._conn.execute('COMMIT')
+            return tasks
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+
+    def heartbeat(self, task_id, worker_id, lease_seconds=120):
+        now = time.time()
+        cursor = self._conn.execute(
+            'UPDATE tasks SET lease_expires = ?, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?',
+            (now + lease_seconds, now, task_id, LEASED, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, task_id, worker_id, result):
+        now = time.time()
+        cursor = self._conn.execute(
+            'UPDATE tasks SET status = ?, result = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? '
+            'WHERE id = ? AND status = ? AND lease_owner = ?',
+            (DONE, json.dumps(result, ensure_ascii=False), now, task_id, LEASED, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, task_id, worker_id, error, retry=True):
+        now = time.time()
+        self._transaction()
+        try:
+            row = self._conn.execute(
+                'SELECT deliveries FROM tasks WHERE id = ? AND status = ? AND lease_owner = ?',
+                (task_id, LEASED, worker_id)
+            ).fetchone()
+            if row is None:
+                self._conn.execute('COMMIT')
+                return None
+            status = PENDING if retry and row['deliveries'] < self.max_deliveries else FAILED
+            self._conn.execute(
+                'UPDATE tasks SET status = ?, error = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? '
+                'WHERE id = ?',
+                (status, error, now, task_id)
+            )
+            self._conn.execute('COMMIT')
+            return status
+        except Exception:
+            self._conn.execute('ROLLBACK')
+            raise
+
+    def release(self, task_id, worker_id):
+        now = time.time()
+        cursor = self._conn.execute(
+            'UPDATE tasks SET status = ?, deliveries = MAX(deliveries - 1, 0), lease_owner = NULL, '
+            'lease_expires = NULL, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?',
+            (PENDING, now, task_id, LEASED, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def job_status(self, job_id):
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        for row in self._conn.execute(
+            'SELECT status, COUNT(*) AS n FROM tasks WHERE job_id = ? GROUP BY status', (job_id,)
+        ):
+            counts[row['status']] = row['n']
+        counts['total'] = sum(counts.values())
+        return counts
+
+    def job_results(self, job_id):
+        results = {}
+        for row in self._conn.execute(
+            'SELECT video_id, status, result, error, deliveries FROM tasks '
+            'WHERE job_id = ? AND status IN (?, ?) ORDER BY position',
+            (job_id, DONE, FAILED)
+        ):
+            if row['result']:
+                results[row['video_id']] = json.loads(row['result'])
+            else:
+                results[row['video_id']] = {
+                    'success': False,
+                    'video_id': row['video_id'],
+                    'error': row['error'] or 'Unknown error',
+                    'attempts': row['deliveries']
+                }
+        return results